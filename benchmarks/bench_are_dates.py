@@ -0,0 +1,39 @@
+"""Throughput benchmark (strings/second) of the batch are_dates against a per-string is_date loop, on a column of
+DICOM-derived metadata with many repeated values.
+Run from the repository root with: python benchmarks/bench_are_dates.py
+"""
+import random
+import time
+from utils_tdinoto.utils_strings import is_date, are_dates
+
+NB_STRINGS = 2 * 10 ** 5
+NB_DISTINCT_SUBJECTS = 5000
+
+
+def main():
+    rng = random.Random(123)
+    pool = ([f"{rng.randint(1990, 2023)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}" for _ in range(NB_DISTINCT_SUBJECTS)]  # DICOM DA
+            + [f"{rng.randint(1990, 2023)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" for _ in range(NB_DISTINCT_SUBJECTS)]  # ISO-8601
+            + [f"sub-{i:04d}" for i in range(NB_DISTINCT_SUBJECTS)]  # not dates
+            + ["T1w", "TOF", "Skyra", "SIEMENS", "075Y", "Mar 08 2024"])
+    column = [rng.choice(pool) for _ in range(NB_STRINGS)]
+
+    start = time.perf_counter()
+    loop_mask = [is_date(value) for value in column]
+    t_loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_mask = are_dates(column, session_labels=False)
+    t_batch_cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    are_dates(column, session_labels=False)
+    t_batch_warm = time.perf_counter() - start
+
+    assert loop_mask == batch_mask.tolist()
+    for name, elapsed in (("is_date loop", t_loop), ("are_dates (cold cache)", t_batch_cold), ("are_dates (warm cache)", t_batch_warm)):
+        print(f"{name:>24}: {elapsed:.3f} s, {NB_STRINGS / elapsed:,.0f} strings/s")
+
+
+if __name__ == '__main__':
+    main()
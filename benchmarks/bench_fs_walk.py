@@ -0,0 +1,76 @@
+"""Benchmark of the os.scandir walker (iter_pseudo_bids_series) against the nested os.listdir/os.path.isdir loops
+previously used by the BIDS scanners, on a local pseudo-BIDS tree where every directory listing and every stat
+is slowed down by a fixed latency to simulate network storage (e.g. NFS).
+Run from the repository root with: python benchmarks/bench_fs_walk.py
+"""
+import os
+import time
+import tempfile
+import functools
+from utils_tdinoto.utils_fs_walk import iter_pseudo_bids_series
+
+NB_SUBJECTS = 60
+NB_SESSIONS = 2
+NB_SERIES = 3
+NB_FILES = 10
+LATENCY_S = 0.002  # per system call
+
+
+def make_tree(root: str) -> None:
+    for sub_idx in range(NB_SUBJECTS):
+        for ses_idx in range(NB_SESSIONS):
+            for series_idx in range(NB_SERIES):
+                series_dir = os.path.join(root, f"sub-{sub_idx:03d}", f"ses-{ses_idx + 1}", f"series_{series_idx}")
+                os.makedirs(series_dir)
+                for file_idx in range(NB_FILES):
+                    open(os.path.join(series_dir, f"{file_idx:04d}.dcm"), "w").close()
+
+
+def with_latency(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        time.sleep(LATENCY_S)  # sleep releases the GIL, like a blocking network round trip
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def listdir_walk(root: str) -> list:
+    """Nested loops in the style of the old scanners: one listdir per directory, plus one isdir per entry"""
+    records = []
+    for sub in sorted(os.listdir(root)):
+        if os.path.isdir(os.path.join(root, sub)):
+            for ses in sorted(os.listdir(os.path.join(root, sub))):
+                if os.path.isdir(os.path.join(root, sub, ses)):
+                    for series in sorted(os.listdir(os.path.join(root, sub, ses))):
+                        if os.path.isdir(os.path.join(root, sub, ses, series)):
+                            series_dir = os.path.join(root, sub, ses, series)
+                            files = tuple(os.path.join(series_dir, f) for f in sorted(os.listdir(series_dir)))
+                            records.append((sub, ses, series, files))
+    return records
+
+
+def main():
+    with tempfile.TemporaryDirectory() as root:
+        make_tree(root)
+        original = os.listdir, os.scandir, os.path.isdir
+        os.listdir, os.scandir, os.path.isdir = (with_latency(func) for func in original)
+        try:
+            start = time.perf_counter()
+            reference = listdir_walk(root)
+            timings = [("listdir + isdir loops", time.perf_counter() - start)]
+            for max_workers in (1, 4, 16):
+                start = time.perf_counter()
+                records = [tuple(record) for record in iter_pseudo_bids_series(root, max_workers=max_workers)]
+                timings.append((f"scandir walker, {max_workers} thread(s)", time.perf_counter() - start))
+                assert records == reference
+        finally:
+            os.listdir, os.scandir, os.path.isdir = original
+
+    nb_series = NB_SUBJECTS * NB_SESSIONS * NB_SERIES
+    print(f"{nb_series} series, {LATENCY_S * 1e3:.0f} ms latency per system call")
+    for name, elapsed in timings:
+        print(f"{name:>30}: {elapsed:.3f} s, {nb_series / elapsed:,.0f} series/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Throughput (MB/s of uncompressed NIfTI) of write_nifti_gz_parallel against the number of compression threads and
+the compression level, compared to sitk.WriteImage (single-threaded), on a synthetic volume with MR-like intensities.
+Run from the repository root with: python benchmarks/bench_gzip_writer.py
+"""
+import os
+import time
+import tempfile
+import numpy as np
+import SimpleITK as sitk
+from utils_tdinoto.utils_nifti_dicom import write_nifti_gz_parallel
+
+SHAPE = (256, 384, 384)  # (slices, rows, columns)
+NB_REPEATS = 2
+COMPRESSION_LEVELS = (1, 6)
+
+
+def best_time(func) -> float:
+    timings = []
+    for _ in range(NB_REPEATS):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    rng = np.random.default_rng(123)
+    zz, yy, xx = np.meshgrid(*[np.linspace(-1, 1, size, dtype=np.float32) for size in SHAPE], indexing="ij")
+    volume = (800 * (xx ** 2 + yy ** 2 + zz ** 2 < 0.7) + rng.normal(0, 20, SHAPE)).clip(0).astype(np.int16)
+    image = sitk.GetImageFromArray(volume)
+    size_mb = volume.nbytes / 2 ** 20
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        out_path = os.path.join(tmp_dir, "volume.nii.gz")
+        t_sitk = best_time(lambda: sitk.WriteImage(image, out_path))
+        print(f"{'sitk.WriteImage':>30}: {size_mb / t_sitk:7.1f} MB/s ({os.path.getsize(out_path) / 2 ** 20:.1f} MB)")
+        nb_threads_list = sorted({1, 2, 4, 8, os.cpu_count() or 1})
+        for level in COMPRESSION_LEVELS:
+            for nb_threads in nb_threads_list:
+                t_parallel = best_time(lambda: write_nifti_gz_parallel(image, out_path, level, nb_threads))
+                print(f"{f'level {level}, {nb_threads} thread(s)':>30}: {size_mb / t_parallel:7.1f} MB/s "
+                      f"({os.path.getsize(out_path) / 2 ** 20:.1f} MB)")
+        assert np.array_equal(sitk.GetArrayFromImage(sitk.ReadImage(out_path)), volume)
+    print(f"{os.cpu_count()} CPUs available")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Memory benchmark of the lazy list helpers (iter_flatten, iter_slice_by_index, iter_chunks) against
+their eager counterparts (flatten_list, slice_by_index) on 10^7-element inputs.
+Run from the repository root with: python benchmarks/bench_lazy_lists.py
+"""
+import time
+import tracemalloc
+from utils_tdinoto.utils_lists import flatten_list, slice_by_index, iter_flatten, iter_slice_by_index, iter_chunks
+
+NB_ELEMENTS = 10 ** 7
+SUBLIST_LEN = 100
+
+
+def measure(func, *args) -> tuple:
+    """This function runs func(*args) and returns its result, the elapsed time and the peak memory allocated while running
+    Args:
+        func: function to benchmark
+        args: positional arguments of func
+    Returns:
+        result: output of func
+        elapsed: elapsed time in seconds
+        peak_mb: peak traced memory in MB
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, elapsed, peak / 2 ** 20
+
+
+def eager_pipeline(nested: list, row_indexes: list) -> int:
+    rows = slice_by_index(nested, row_indexes)  # materializes the gathered rows
+    flat = flatten_list(rows)  # materializes the flat list
+    batches = [flat[i: i + 1000] for i in range(0, len(flat), 1000)]  # materializes all batches
+    return sum(sum(batch) for batch in batches)
+
+
+def lazy_pipeline(nested: list, row_indexes: range) -> int:
+    rows = iter_slice_by_index(nested, row_indexes)
+    return sum(sum(chunk) for chunk in iter_chunks(iter_flatten(rows), 1000))
+
+
+def lazy_gather(flat: list, indexes: range) -> int:
+    return sum(sum(chunk) for chunk in iter_chunks(iter_slice_by_index(flat, indexes), 1000))
+
+
+def eager_gather(flat: list, indexes: list) -> int:
+    sliced = slice_by_index(flat, indexes)
+    return sum(sum(sliced[i: i + 1000]) for i in range(0, len(sliced), 1000))
+
+
+def main():
+    nested = [list(range(i, i + SUBLIST_LEN)) for i in range(0, NB_ELEMENTS, SUBLIST_LEN)]
+    flat = flatten_list(nested)
+    indexes = range(0, NB_ELEMENTS, 2)
+    row_indexes = range(0, len(nested), 2)
+
+    benchmarks = (("eager gather + flatten + batch", eager_pipeline, nested, list(row_indexes)),
+                  ("lazy gather + flatten + batch", lazy_pipeline, nested, row_indexes),
+                  ("eager gather on flat list", eager_gather, flat, list(indexes)),
+                  ("lazy gather on flat list", lazy_gather, flat, indexes))
+    for name, pipeline, data, idxs in benchmarks:
+        result, elapsed, peak_mb = measure(pipeline, data, idxs)
+        print(f"{name:>32}: result={result}, time={elapsed:.2f} s, peak memory={peak_mb:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark of the multi-class branch of plot_roc_curve (one-hot encoding + micro-average ROC) with the numpy
+one_hot_encode against torch.nn.functional.one_hot, and of the cold import time of utils_plots against torch's.
+The torch measurements are skipped if torch is not installed (it is now the optional "torch" extra).
+Run from the repository root with: python benchmarks/bench_one_hot_roc.py
+"""
+import os
+import sys
+import time
+import subprocess
+import numpy as np
+from sklearn.metrics import roc_curve, auc
+from utils_tdinoto.utils_numpy import one_hot_encode
+try:
+    import torch
+except ImportError:
+    torch = None
+
+NB_SAMPLES = 2 * 10 ** 5
+NB_CLASSES = 10
+NB_REPEATS = 5
+
+
+def cold_import_time(statement: str) -> float:
+    """Best wall time (seconds) of a fresh interpreter running statement"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], check=True, env=env)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def micro_roc(y_test_one_hot: np.ndarray,
+              y_pred_proba: np.ndarray) -> float:
+    fpr, tpr, _ = roc_curve(y_test_one_hot.ravel(), y_pred_proba.ravel())
+    return auc(fpr, tpr)
+
+
+def best_time(func) -> float:
+    timings = []
+    for _ in range(NB_REPEATS):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    rng = np.random.default_rng(123)
+    labels = rng.integers(0, NB_CLASSES, NB_SAMPLES)
+    y_pred_proba = rng.dirichlet(np.ones(NB_CLASSES), NB_SAMPLES)
+
+    print(f"{'python -c pass':>40}: {cold_import_time('pass'):.3f} s")
+    print(f"{'import utils_tdinoto.utils_plots':>40}: {cold_import_time('import utils_tdinoto.utils_plots'):.3f} s")
+    if torch is not None:
+        print(f"{'import torch':>40}: {cold_import_time('import torch'):.3f} s")
+
+    t_numpy_one_hot = best_time(lambda: one_hot_encode(labels, NB_CLASSES))
+    t_numpy_roc = best_time(lambda: micro_roc(one_hot_encode(labels, NB_CLASSES), y_pred_proba))
+    print(f"{'one_hot_encode':>40}: {t_numpy_one_hot * 1e3:.1f} ms")
+    print(f"{'one_hot_encode + micro ROC':>40}: {t_numpy_roc * 1e3:.1f} ms")
+    if torch is not None:
+        def torch_one_hot():
+            return torch.nn.functional.one_hot(torch.as_tensor(labels), num_classes=NB_CLASSES).detach().cpu().numpy()
+        assert np.array_equal(torch_one_hot(), one_hot_encode(labels, NB_CLASSES))
+        print(f"{'torch one_hot':>40}: {best_time(torch_one_hot) * 1e3:.1f} ms")
+        print(f"{'torch one_hot + micro ROC':>40}: {best_time(lambda: micro_roc(torch_one_hot(), y_pred_proba)) * 1e3:.1f} ms")
+    else:
+        print("torch is not installed: torch timings skipped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Timing benchmark of MultiPatternMatcher against calling check_if_string_is_in_any_item_of_list once per pattern,
+with 1k patterns and 1M strings (series descriptions / filenames-like).
+Run from the repository root with: python benchmarks/bench_pattern_matching.py
+"""
+import random
+import string
+import time
+from utils_tdinoto.utils_lists import check_if_string_is_in_any_item_of_list
+from utils_tdinoto.utils_pattern_matching import MultiPatternMatcher
+
+NB_PATTERNS = 1000
+NB_STRINGS = 10 ** 6
+NB_STRINGS_LOOP = 10 ** 4  # the per-pattern loop is too slow to run on the whole corpus
+
+
+def random_word(rng: random.Random,
+                min_len: int,
+                max_len: int) -> str:
+    return "".join(rng.choice(string.ascii_letters + string.digits) for _ in range(rng.randint(min_len, max_len)))
+
+
+def main():
+    rng = random.Random(123)
+    patterns = [random_word(rng, 4, 10) for _ in range(NB_PATTERNS)]
+    corpus = [f"sub-{i:06d}_ses-{rng.randint(20000101, 20231231)}_{random_word(rng, 5, 20)}.nii.gz" for i in range(NB_STRINGS)]
+
+    start = time.perf_counter()
+    matcher = MultiPatternMatcher(patterns)
+    print(f"compile {NB_PATTERNS} patterns: {time.perf_counter() - start:.3f} s")
+
+    # previous approach: one pass over the corpus per pattern, and one "in" test per (pattern, string) pair
+    sub_corpus = corpus[:NB_STRINGS_LOOP]
+    start = time.perf_counter()
+    loop_any = any(check_if_string_is_in_any_item_of_list(sub_corpus, p) for p in patterns)
+    loop_items = [i for i, item in enumerate(sub_corpus) if any(p in item for p in patterns)]
+    loop_patterns = [{p for p in patterns if p in item} for item in sub_corpus]
+    t_loop = time.perf_counter() - start
+    assert loop_any == matcher.matches_any(sub_corpus)
+    assert loop_items == matcher.matching_items(sub_corpus)
+    assert loop_patterns == matcher.patterns_per_item(sub_corpus)
+    print(f"per-pattern loops ({NB_STRINGS_LOOP} strings): {t_loop:.3f} s "
+          f"(~{t_loop * NB_STRINGS / NB_STRINGS_LOOP:.1f} s extrapolated to {NB_STRINGS} strings)")
+
+    for name, func in (("matches_any", matcher.matches_any),
+                       ("matching_items", matcher.matching_items),
+                       ("patterns_per_item", matcher.patterns_per_item)):
+        start = time.perf_counter()
+        func(corpus)
+        elapsed = time.perf_counter() - start
+        print(f"{name} ({NB_STRINGS} strings): {elapsed:.3f} s")
+
+
+if __name__ == '__main__':
+    main()
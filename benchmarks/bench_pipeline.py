@@ -0,0 +1,75 @@
+"""End-to-end latency per subject of the preprocessing chain dcm2nii_sitk -> bias_field_correction_sitk ->
+resample_volume -> remove_zeros_ijk_from_volume (one compressed file per stage) against the in-memory ImagePipeline
+(only the final output is written), on a synthetic dicom series.
+N4 usually dominates the runtime; pass --no-n4 to skip it in both chains and only compare the file round trips.
+Run from the repository root with: python benchmarks/bench_pipeline.py [--no-n4]
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import SimpleITK as sitk
+from utils_tdinoto.utils_nifti_dicom import dcm2nii_sitk, bias_field_correction_sitk, resample_volume, remove_zeros_ijk_from_volume
+from utils_tdinoto.utils_pipeline import standard_preprocessing_pipeline
+from utils_tdinoto.utils_profiling import enable_profiling
+
+SHAPE = (64, 160, 160)  # (slices, rows, columns)
+SPACING = (0.6, 0.6, 1.0)
+NEW_SPACING = [0.8, 0.8, 0.8]
+
+
+def write_synthetic_series(dcm_dir: str) -> None:
+    zz, yy, xx = np.meshgrid(*[np.linspace(-1, 1, size) for size in SHAPE], indexing="ij")
+    volume = (1000 * (xx ** 2 + yy ** 2 + zz ** 2 < 0.6) * (1 + 0.3 * xx)).astype(np.int16)  # sphere with a bias field
+    image = sitk.GetImageFromArray(volume)
+    image.SetSpacing(SPACING)
+    writer = sitk.ImageFileWriter()
+    writer.KeepOriginalImageUIDOn()  # otherwise each slice gets a new SeriesInstanceUID
+    for slice_idx in range(SHAPE[0]):
+        one_slice = image[:, :, slice_idx]
+        one_slice.SetMetaData("0020|000e", "1.2.3.4")  # SeriesInstanceUID
+        one_slice.SetMetaData("0008|0018", f"1.2.3.4.{slice_idx + 1}")  # SOPInstanceUID
+        one_slice.SetMetaData("0020|0032", f"0\\0\\{slice_idx * SPACING[2]}")  # ImagePositionPatient
+        one_slice.SetMetaData("0020|0037", "1\\0\\0\\0\\1\\0")  # ImageOrientationPatient
+        one_slice.SetMetaData("0020|0013", str(slice_idx + 1))  # InstanceNumber
+        writer.SetFileName(os.path.join(dcm_dir, f"{slice_idx:04d}.dcm"))
+        writer.Execute(one_slice)
+
+
+def file_based_chain(dcm_dir: str,
+                     out_dir: str,
+                     with_n4: bool) -> float:
+    start = time.perf_counter()
+    dcm2nii_sitk(dcm_dir, out_dir, "converted")
+    resample_input = os.path.join(out_dir, "converted.nii.gz")
+    if with_n4:
+        bias_field_correction_sitk(resample_input, os.path.join(out_dir, "n4.nii.gz"))
+        resample_input = os.path.join(out_dir, "n4.nii.gz")
+    _, _, resampled = resample_volume(resample_input, NEW_SPACING, os.path.join(out_dir, "resampled_tmp.nii.gz"))
+    remove_zeros_ijk_from_volume(resampled)
+    return time.perf_counter() - start
+
+
+def main():
+    with_n4 = "--no-n4" not in sys.argv[1:]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dcm_dir = os.path.join(tmp_dir, "dcm")
+        os.makedirs(dcm_dir)
+        write_synthetic_series(dcm_dir)
+
+        t_files = file_based_chain(dcm_dir, tmp_dir, with_n4)
+        profiler = enable_profiling()
+        result = standard_preprocessing_pipeline(NEW_SPACING, bias_field_correction=with_n4).run(dcm_dir, os.path.join(tmp_dir, "pipeline.nii.gz"))
+        t_pipeline = sum(result.timings.values())
+
+    print(f"{'file-based chain':>20}: {t_files:.2f} s")
+    print(f"{'in-memory pipeline':>20}: {t_pipeline:.2f} s")
+    for stage_name, elapsed in result.timings.items():
+        print(f"{stage_name:>20}  {elapsed:.2f} s")
+    print()
+    print(profiler.to_table())
+
+
+if __name__ == '__main__':
+    main()
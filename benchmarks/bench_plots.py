@@ -0,0 +1,62 @@
+"""Throughput (figures/second) and memory benchmark of save_loss_curves: sequential rendering, parallel rendering with
+render_plots_in_parallel, and peak RSS after many plots (it must stay flat, since figures are no longer kept by pyplot).
+Run from the repository root with: python benchmarks/bench_plots.py [nb_plots_for_rss]
+"""
+import os
+import sys
+import time
+import resource
+import tempfile
+import numpy as np
+from utils_tdinoto.utils_plots import save_loss_curves, render_plots_in_parallel
+
+NB_PLOTS = 64
+NB_EPOCHS = 200
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10  # KB on Linux
+
+
+def make_kwargs(out_dir: str, nb_plots: int) -> list:
+    rng = np.random.default_rng(123)
+    kwargs_list = []
+    for run_idx in range(nb_plots):
+        train_loss = np.exp(-np.linspace(0, 5, NB_EPOCHS)) + 0.05 * rng.random(NB_EPOCHS)
+        kwargs_list.append({"train_loss": train_loss.tolist(),
+                            "val_loss": (train_loss + 0.1 * rng.random(NB_EPOCHS)).tolist(),
+                            "image_dir": out_dir,
+                            "image_filename": f"run_{run_idx:05d}.png"})
+    return kwargs_list
+
+
+def main():
+    nb_plots_rss = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    with tempfile.TemporaryDirectory() as out_dir:
+        kwargs_list = make_kwargs(out_dir, NB_PLOTS)
+
+        start = time.perf_counter()
+        for kwargs in kwargs_list:
+            save_loss_curves(**kwargs)
+        t_sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        render_plots_in_parallel(save_loss_curves, kwargs_list)
+        t_parallel = time.perf_counter() - start
+
+        print(f"{'sequential':>30}: {NB_PLOTS / t_sequential:.1f} figures/s")
+        print(f"{f'parallel ({os.cpu_count()} processes)':>30}: {NB_PLOTS / t_parallel:.1f} figures/s")
+
+        # peak RSS after a warm-up and after many more plots, in the same process
+        kwargs = kwargs_list[0]
+        rss_checkpoints = {}
+        for plot_idx in range(1, nb_plots_rss + 1):
+            save_loss_curves(**kwargs)
+            if plot_idx in (nb_plots_rss // 10, nb_plots_rss):
+                rss_checkpoints[plot_idx] = peak_rss_mb()
+        for plot_idx, rss in rss_checkpoints.items():
+            print(f"{f'peak RSS after {plot_idx} plots':>30}: {rss:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Timing benchmark of the vectorized round_half_up_array against a Python loop of round_half_up, on 10^7 values.
+Run from the repository root with: python benchmarks/bench_round_half_up.py
+"""
+import time
+import numpy as np
+import pandas as pd
+from utils_tdinoto.numeric import round_half_up, round_half_up_array
+
+NB_VALUES = 10 ** 7
+NB_VALUES_EXACT = 10 ** 6  # Decimal-exact mode is much slower, so it runs on fewer values
+DECIMALS = 2
+
+
+def main():
+    values = np.random.default_rng(123).uniform(0, 1000, NB_VALUES)
+
+    start = time.perf_counter()
+    loop_rounded = [round_half_up(value, DECIMALS) for value in values.tolist()]
+    t_loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized_rounded = round_half_up_array(values, DECIMALS)
+    t_vectorized = time.perf_counter() - start
+
+    start = time.perf_counter()
+    round_half_up_array(pd.Series(values), DECIMALS)
+    t_series = time.perf_counter() - start
+
+    start = time.perf_counter()
+    exact_rounded = round_half_up_array(values[:NB_VALUES_EXACT], DECIMALS, exact=True)
+    t_exact = (time.perf_counter() - start) * NB_VALUES / NB_VALUES_EXACT
+
+    nb_differences = np.count_nonzero(np.asarray(loop_rounded) != vectorized_rounded)
+    nb_differences_exact = np.count_nonzero(exact_rounded != vectorized_rounded[:NB_VALUES_EXACT])
+    print(f"python loop: {t_loop:.3f} s")
+    print(f"numpy array: {t_vectorized:.3f} s (speedup = {t_loop / t_vectorized:.1f}x)")
+    print(f"pandas Series: {t_series:.3f} s (speedup = {t_loop / t_series:.1f}x)")
+    print(f"exact (Decimal) mode: {t_exact:.3f} s (extrapolated from {NB_VALUES_EXACT} values)")
+    print(f"values rounded differently than the loop (representation errors fixed): {nb_differences}; "
+          f"than the exact mode: {nb_differences_exact}")
+
+
+if __name__ == '__main__':
+    main()
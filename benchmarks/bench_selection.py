@@ -0,0 +1,73 @@
+"""Timing benchmark of utils_selection against the previous helpers (list.index(max(...)), sorting, re-scanning the history).
+Run from the repository root with: python benchmarks/bench_selection.py
+"""
+import random
+import timeit
+from collections import Counter
+import numpy as np
+from utils_tdinoto.utils_selection import argmax_first, argmin_first, top_k, top_k_dict_items, top_k_indexes_array, RunningBest
+
+NB_VALUES = 10 ** 6
+NB_KEYS = 10 ** 5
+K = 10
+NB_REPEATS = 5
+
+
+def old_first_argmax(input_list: list) -> int:
+    return input_list.index(max(input_list))
+
+
+def old_first_argmin(input_list: list) -> int:
+    return input_list.index(min(input_list))
+
+
+def report(name: str, old_func, new_func) -> None:
+    """This function times old_func and new_func and prints their average running time
+    Args:
+        name: name of the benchmark
+        old_func: callable without arguments implementing the previous approach
+        new_func: callable without arguments implementing the new approach
+    """
+    assert old_func() == new_func(), f"{name}: results differ"
+    t_old = timeit.timeit(old_func, number=NB_REPEATS) / NB_REPEATS
+    t_new = timeit.timeit(new_func, number=NB_REPEATS) / NB_REPEATS
+    print(f"{name:>28}: old = {t_old * 1e3:8.2f} ms, new = {t_new * 1e3:8.2f} ms, speedup = {t_old / t_new:.2f}x")
+
+
+def main():
+    rng = random.Random(123)
+    history = [rng.random() for _ in range(NB_VALUES)]
+    history_np = np.asarray(history)
+    label_counts = Counter({f"label_{i}": rng.randint(0, 10 ** 6) for i in range(NB_KEYS)})
+
+    report("argmax (list)", lambda: old_first_argmax(history), lambda: argmax_first(history))
+    report("argmin (list)", lambda: old_first_argmin(history), lambda: argmin_first(history))
+    report("argmax (numpy array)", lambda: old_first_argmax(history), lambda: argmax_first(history_np))
+    report("argmin (generator)", lambda: old_first_argmin(list(iter(history))), lambda: argmin_first(iter(history)))
+    report("top-k (list)", lambda: [i for i, _ in sorted(enumerate(history), key=lambda x: -x[1])[:K]],
+           lambda: [i for i, _ in top_k(history, K)])
+    report("top-k (dict)", lambda: label_counts.most_common(K), lambda: top_k_dict_items(label_counts, K))
+    report("top-k (numpy array)", lambda: list(np.argsort(-history_np, kind="stable")[:K]),
+           lambda: list(top_k_indexes_array(history_np, K)))
+
+    def running_best_loop():
+        tracker = RunningBest(mode="min")
+        for value in history:
+            tracker.update(value)
+        return tracker.best_index
+
+    def growing_history_loop():  # previous approach: re-scan the whole history at every epoch
+        seen = []
+        idx = -1
+        for value in history[:10 ** 4]:
+            seen.append(value)
+            idx = old_first_argmin(seen)
+        return idx
+
+    t_running = timeit.timeit(running_best_loop, number=1)
+    t_rescan = timeit.timeit(growing_history_loop, number=1)
+    print(f"{'running best (1e6 updates)':>28}: {t_running * 1e3:.2f} ms; re-scan of history (only 1e4 epochs): {t_rescan * 1e3:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
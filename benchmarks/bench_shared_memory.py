@@ -0,0 +1,73 @@
+"""Transfer overhead of handing a volume to process-pool workers by pickling (the slabs are sent with each task and
+the results sent back) against shared_parallel_map (the volume is published once in shared memory and only slab
+indexes are pickled), on a per-slab statistics task that does almost no compute, so the timings are mostly transfer.
+Run from the repository root with: python benchmarks/bench_shared_memory.py
+"""
+import os
+import time
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from utils_tdinoto.utils_shared_memory import SharedArrays, shared_parallel_map
+
+SHAPE = (256, 384, 384)  # (slices, rows, columns), float32: 144 MB
+SLAB_SIZE = 16
+MAX_WORKERS = 2
+NB_REPEATS = 3
+
+
+def slab_stats_pickled(slab: np.ndarray) -> np.ndarray:
+    return np.stack([slab.mean(axis=0), slab.max(axis=0)])
+
+
+def slab_stats_shared(arrays: dict,
+                      z: int) -> None:
+    slab = arrays["volume"][z: z + SLAB_SIZE]
+    arrays["stats"][z // SLAB_SIZE] = np.stack([slab.mean(axis=0), slab.max(axis=0)])
+
+
+def best_time(func) -> float:
+    timings = []
+    for _ in range(NB_REPEATS):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    volume = np.random.default_rng(123).normal(size=SHAPE).astype(np.float32)
+    slab_starts = range(0, SHAPE[0], SLAB_SIZE)
+    stats_shape = (len(slab_starts), 2) + SHAPE[1:]
+
+    t_pickle = best_time(lambda: pickle.dumps(volume, protocol=pickle.HIGHEST_PROTOCOL))
+    t_publish = best_time(lambda: SharedArrays.publish({"volume": volume}).close())
+    print(f"{'pickle.dumps(volume)':>35}: {t_pickle * 1e3:8.1f} ms")
+    print(f"{'SharedArrays.publish + close':>35}: {t_publish * 1e3:8.1f} ms")
+    with SharedArrays.publish({"volume": volume}) as shared:
+        print(f"{'pickled descriptor':>35}: {len(pickle.dumps(shared.descriptors['volume']))} bytes "
+              f"(pickled volume: {len(pickle.dumps(volume, protocol=pickle.HIGHEST_PROTOCOL)) / 2 ** 20:.0f} MB)")
+
+    with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        list(executor.map(abs, range(MAX_WORKERS)))  # start the workers outside of the timings
+
+        def pickled_map():
+            return np.stack(list(executor.map(slab_stats_pickled, (volume[z: z + SLAB_SIZE] for z in slab_starts))))
+        t_pickled_map = best_time(pickled_map)
+
+    with SharedArrays({"volume": (SHAPE, np.float32), "stats": (stats_shape, np.float32)}) as shared:
+        np.copyto(shared.arrays["volume"], volume)
+        t_shared_map = best_time(lambda: shared_parallel_map(slab_stats_shared, slab_starts, shared, writable=["stats"], max_workers=MAX_WORKERS))
+        expected_stats = np.stack([slab_stats_pickled(volume[z: z + SLAB_SIZE]) for z in slab_starts])
+        assert np.allclose(shared.arrays["stats"], expected_stats)
+    stats = np.empty(stats_shape, np.float32)
+    t_shared_map_copy = best_time(lambda: shared_parallel_map(slab_stats_shared, slab_starts, {"volume": volume, "stats": stats}, writable=["stats"], max_workers=MAX_WORKERS))
+
+    print(f"{'pickled map (warm pool)':>35}: {t_pickled_map * 1e3:8.1f} ms")
+    print(f"{'shared map (SharedArrays)':>35}: {t_shared_map * 1e3:8.1f} ms (includes starting the pool)")
+    print(f"{'shared map (dict, publish + copy)':>35}: {t_shared_map_copy * 1e3:8.1f} ms (includes starting the pool)")
+    print(f"{os.cpu_count()} CPUs available")
+
+
+if __name__ == '__main__':
+    main()
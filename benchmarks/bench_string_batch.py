@@ -0,0 +1,41 @@
+"""Timing benchmark of the batch string kernels (keep_only_digits_batch, add_leading_zeros_batch,
+remove_leading_zeros_batch, str2bool_batch) against row-by-row loops, over 10^6 rows.
+Run from the repository root with: python benchmarks/bench_string_batch.py
+"""
+import random
+import time
+import numpy as np
+import pandas as pd
+from utils_tdinoto.utils_strings import (keep_only_digits, add_leading_zeros, remove_leading_zeros, str2bool,
+                                         keep_only_digits_batch, add_leading_zeros_batch, remove_leading_zeros_batch, str2bool_batch)
+
+NB_ROWS = 10 ** 6
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    rng = random.Random(123)
+    ages = [f"{rng.randint(0, 99):03d}Y" for _ in range(NB_ROWS)]
+    sub_ids = [str(rng.randint(1, 9999)) for _ in range(NB_ROWS)]
+    flags = [rng.choice(["yes", "No", "TRUE", "f", "1", "0"]) for _ in range(NB_ROWS)]
+
+    benchmarks = (("keep_only_digits", lambda x: [keep_only_digits(s) for s in x], keep_only_digits_batch, ages),
+                  ("add_leading_zeros", lambda x: [add_leading_zeros(s, 4) for s in x], lambda x: add_leading_zeros_batch(x, 4), sub_ids),
+                  ("remove_leading_zeros", lambda x: [remove_leading_zeros(s) for s in x], remove_leading_zeros_batch, ages),
+                  ("str2bool", lambda x: [str2bool(s) for s in x], str2bool_batch, flags))
+    for name, loop_func, batch_func, column in benchmarks:
+        t_loop = timed(loop_func, column)
+        t_list = timed(batch_func, column)
+        t_numpy = timed(batch_func, np.array(column))
+        t_pandas = timed(batch_func, pd.Series(column))
+        print(f"{name:>20}: loop = {t_loop:.3f} s, batch list = {t_list:.3f} s, "
+              f"batch numpy = {t_numpy:.3f} s, batch pandas = {t_pandas:.3f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,10 @@
 import math
 import logging
+from decimal import Decimal, ROUND_HALF_UP
+import numpy as np
+
+# relative tolerance used to compensate floating-point representation errors (e.g. 2.675 is stored as 2.67499999...)
+_REPRESENTATION_EPS = 4 * np.finfo(float).eps
 
 
 def round_half_up(n: float,
@@ -19,6 +24,77 @@ def round_half_up(n: float,
     return rounded_number
 
 
+def _round_half_up_decimal(value: float,
+                           decimals: int) -> float:
+    if not math.isfinite(value):
+        return value
+    quantum = Decimal(1).scaleb(-int(decimals))  # e.g. Decimal("0.01") for decimals=2
+    return float(Decimal(repr(value)).quantize(quantum, rounding=ROUND_HALF_UP))
+
+
+def round_half_up_array(values,
+                        decimals=0,
+                        exact: bool = False):
+    """This function is the vectorized version of round_half_up for numpy arrays, pandas Series and DataFrames.
+    Ties are rounded away from zero (e.g. 2.5 becomes 3.0 and -2.5 becomes -3.0, like Decimal's ROUND_HALF_UP;
+    note that round_half_up instead rounds -2.5 to -2.0). Values whose decimal representation ends in 5 but that are stored
+    slightly below it (e.g. 2.675 -> 2.67499999...) are rounded as written (2.68).
+    Args:
+        values: input numbers (scalar, list, numpy array, pandas Series or DataFrame)
+        decimals: number of decimal figures that we want to keep; either an int or an array broadcastable against values
+            (e.g. one value per column); for DataFrames, also a dict that maps column names to decimals, in which case
+            (as with DataFrame.round) the columns that are not in the dict are left unchanged. Non-numeric DataFrame
+            columns are always left unchanged
+        exact: if True, round each value with Python's Decimal instead of floating-point arithmetic (exact, but much slower)
+    Returns:
+        rounded_values: rounded values, with the same type (and index/columns) as the input for numpy and pandas objects
+    Example:
+        >>> round_half_up_array(np.array([2.5, -2.5, 2.675, 1.005]), decimals=np.array([0, 0, 2, 2]))
+        array([ 3. , -3. ,  2.68,  1.01])
+    """
+    is_dataframe = hasattr(values, "columns")
+    if is_dataframe and (isinstance(decimals, dict) or any(dtype.kind not in "iuf" for dtype in values.dtypes)):
+        return _round_half_up_dataframe_columns(values, decimals, exact)
+    array = np.asarray(values, dtype=float)
+    decimals = np.asarray(decimals)
+
+    if exact:
+        rounded = np.vectorize(_round_half_up_decimal, otypes=[float])(array, decimals)
+    else:
+        multiplier = 10.0 ** decimals
+        scaled = np.abs(array) * multiplier
+        rounded = np.floor(scaled + 0.5 + scaled * _REPRESENTATION_EPS) / multiplier
+        rounded = np.copysign(rounded, array)
+
+    if is_dataframe:
+        return type(values)(rounded, index=values.index, columns=values.columns)
+    if hasattr(values, "index"):  # pandas Series
+        return type(values)(rounded, index=values.index, name=values.name)
+    if rounded.ndim == 0:  # scalar input
+        return float(rounded)
+
+    return rounded
+
+
+def _round_half_up_dataframe_columns(dataframe,
+                                     decimals,
+                                     exact: bool):
+    """This function rounds the numeric columns of a DataFrame one at a time, like DataFrame.round: with a dict, only
+    the listed columns are rounded; non-numeric columns are copied through unchanged"""
+    if isinstance(decimals, dict):
+        decimals_by_column = {column: column_decimals for column, column_decimals in decimals.items() if column in dataframe.columns}
+    elif np.ndim(decimals) == 0:
+        decimals_by_column = {column: decimals for column in dataframe.columns}
+    else:  # one value per column
+        decimals_by_column = dict(zip(dataframe.columns, np.broadcast_to(decimals, (len(dataframe.columns),)).tolist()))
+    rounded = dataframe.copy()
+    for column, column_decimals in decimals_by_column.items():
+        if dataframe[column].dtype.kind in "iuf":  # numeric columns only (bool, object, datetime, ... are skipped)
+            rounded[column] = round_half_up_array(dataframe[column], column_decimals, exact)
+
+    return rounded
+
+
 def print_running_time(start_time: float,
                        end_time: float,
                        process_name: str) -> None:
@@ -27,6 +103,8 @@ def print_running_time(start_time: float,
         start_time: instant when the timer was started
         end_time: instant when the timer was stopped
         process_name: name of the process
+    Note:
+        to time (nested) pipeline steps without measuring start and end by hand, see utils_profiling.py
     """
     sentence = str(process_name)  # convert to string whatever the user inputs as third argument
     temp = end_time - start_time  # compute time difference
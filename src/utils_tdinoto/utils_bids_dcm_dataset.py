@@ -1,4 +1,5 @@
 import os
+import json
 import pydicom
 from collections import Counter
 import numpy as np
@@ -6,9 +7,28 @@ from utils_tdinoto.utils_strings import keep_only_digits
 import SimpleITK as sitk
 import pandas as pd
 from tqdm import tqdm
+from typing import Optional, Tuple
 from utils_tdinoto.numeric import round_half_up
+from utils_tdinoto.utils_io import create_dir_if_not_exist
+from utils_tdinoto.utils_profiling import profiled
+from utils_tdinoto.utils_bids_paths import is_bids_subject_label, is_bids_session_label
+from utils_tdinoto.utils_fs_walk import scan_dir_sorted, list_subdirs, iter_pseudo_bids_series
 
+# PatientAge has the DICOM AS value representation "nnnU", with U in {D, W, M, Y}; legacy values without unit are in years
+_DCM_AGE_REGEX = r"^\s*(\d+(?:\.\d+)?)\s*([DWMYdwmy]?)\s*$"
+_DCM_AGE_UNIT_TO_YEARS = {"D": 1 / 365.25, "W": 7 / 365.25, "M": 1 / 12, "Y": 1.0, "": 1.0}
 
+ACQUISITION_PARAMS_COLUMNS = ['vendor', 'scanner', 'field_strength', 'TR', 'TE', 'spacing_x', 'spacing_y', 'spacing_z']
+# raw ManufacturerModelName -> harmonized scanner name; extend it (or pass a custom map) when new scanners show up
+SCANNER_NAME_MAP = {'Trio': 'TrioTim',
+                    'Skyra_fit': 'Skyra',
+                    'Prisma_fit': 'Prisma',
+                    'SymphonyVision': 'Symphony',
+                    'GENESIS_SIGNA': 'Signa',
+                    'Signa HDxt': 'Signa'}
+
+
+@profiled()
 def print_patient_sex_and_age(bids_dir: str,
                               bids_dcm_dir: str) -> None:
     """This function loops over a pseudo-BIDS dataset dir and prints the patient sex
@@ -25,28 +45,33 @@ def print_patient_sex_and_age(bids_dir: str,
     """
     all_sex = []
     all_ages = []
-    for sub in sorted(os.listdir(bids_dir)):
-        if "sub" in sub and os.path.isdir(os.path.join(bids_dir, sub)):
-            if len(os.listdir(os.path.join(bids_dir, sub))) >= 1:  # if there is at least one ses
-                first_ses = os.listdir(os.path.join(bids_dir, sub))[0]
-                if os.path.exists(os.path.join(bids_dcm_dir, sub, first_ses)):
-                    if len(os.listdir(os.path.join(bids_dcm_dir, sub, first_ses))) >= 1:  # if there is at least one series
-                        first_dcm_series = os.listdir(os.path.join(bids_dcm_dir, sub, first_ses))[0]
-                        if len(os.listdir(os.path.join(bids_dcm_dir, sub, first_ses, first_dcm_series))) >= 1:  # if there is at least one dcm image
-                            first_dcm_img = os.listdir(os.path.join(bids_dcm_dir, sub, first_ses, first_dcm_series))[0]
-                            first_dcm_img_tags = pydicom.dcmread(os.path.join(bids_dcm_dir, sub, first_ses, first_dcm_series, first_dcm_img))
-                            sex = first_dcm_img_tags.PatientSex
-                            age = first_dcm_img_tags.PatientAge
-                            all_sex.append(sex)
-                            all_ages.append(age)
-                else:
+    # each directory is listed only once (see utils_fs_walk), which matters on network storage
+    for sub_entry in scan_dir_sorted(bids_dir):
+        sub = sub_entry.name
+        if is_bids_subject_label(sub) and sub_entry.is_dir():
+            all_ses = [entry.name for entry in scan_dir_sorted(sub_entry.path)]
+            if len(all_ses) >= 1:  # if there is at least one ses
+                first_ses = all_ses[0]
+                all_dcm_series = list_subdirs(os.path.join(bids_dcm_dir, sub, first_ses))  # empty if the dir does not exist
+                if len(all_dcm_series) >= 1:  # if there is at least one series
+                    first_dcm_series = all_dcm_series[0]
+                    dcm_images = [entry.path for entry in scan_dir_sorted(os.path.join(bids_dcm_dir, sub, first_ses, first_dcm_series)) if entry.is_file()]
+                    if len(dcm_images) >= 1:  # if there is at least one dcm image
+                        first_dcm_img_tags = pydicom.dcmread(dcm_images[0])
+                        sex = first_dcm_img_tags.PatientSex
+                        age = first_dcm_img_tags.PatientAge
+                        all_sex.append(sex)
+                        all_ages.append(age)
+                elif not os.path.exists(os.path.join(bids_dcm_dir, sub, first_ses)):  # only stat when the listing is empty
                     print(f"{sub}_{first_ses} missing")
     print(f"\n{len(all_sex)} subjects found")
     occurrence_count_sex = Counter(all_sex)
     print(f"\nSex: {occurrence_count_sex}")
-    all_ages_only_numbers = [int(keep_only_digits(x)) for x in all_ages]
-    mean_age, std_age = np.mean(all_ages_only_numbers), np.std(all_ages_only_numbers)
+    ages_years, valid_ages = decode_dcm_ages(all_ages)
+    mean_age, std_age = np.mean(ages_years[valid_ages]), np.std(ages_years[valid_ages])
     print(f"\nAge: mean={mean_age}, std={std_age}")
+    if not np.all(valid_ages):
+        print(f"{np.count_nonzero(~valid_ages)} invalid ages were excluded")
 
 
 def print_median_values(df: pd.DataFrame,
@@ -60,97 +85,136 @@ def print_median_values(df: pd.DataFrame,
     print(f"\nmedian values {scanner_name}: TR = {round_half_up(median_tr)}, TE = {round_half_up(median_te)}, spacing = {median_spacing_x} x {median_spacing_y} x {median_spacing_z}")
 
 
-def find_mr_acquisition_params(bids_ds: str,
-                               dcm_dir: str) -> None:
-    cnt_subs = 0
+def read_acquisition_params_from_dcm(path_dcm_img: str) -> Tuple[pydicom.dataset.FileDataset, list]:
+    """This function reads the acquisition parameters from one dicom image
+    Args:
+        path_dcm_img: path to dicom image
+    Returns:
+        one_dcm_img: dicom header (pixel data is not loaded)
+        acquisition_params: [vendor, scanner, field_strength, TR, TE, spacing_x, spacing_y, spacing_z]
+    """
+    one_dcm_img = pydicom.dcmread(path_dcm_img, stop_before_pixels=True)
+    manufacturer = one_dcm_img.Manufacturer
+    model = one_dcm_img.ManufacturerModelName
+    field_strength = one_dcm_img.MagneticFieldStrength
+    tr = one_dcm_img.RepetitionTime
+    te = one_dcm_img.EchoTime
+
+    reader = sitk.ImageFileReader()
+    reader.SetFileName(path_dcm_img)
+    reader.ReadImageInformation()  # header only: same spacing as sitk.ReadImage, without decoding the pixel data
+    voxel_spacing = reader.GetSpacing()
+    spacing_x = round(voxel_spacing[0], 2)
+    spacing_y = round(voxel_spacing[1], 2)
+    spacing_z = round(voxel_spacing[2], 2)
+    acquisition_params = [manufacturer, model, field_strength, tr, te, spacing_x, spacing_y, spacing_z]
+
+    return one_dcm_img, acquisition_params
+
+
+def collect_mr_acquisition_params(bids_ds: str,
+                                  dcm_dir: str,
+                                  max_workers: int = 8) -> pd.DataFrame:
+    """This function loops over a pseudo-BIDS dicom dataset and collects the acquisition parameters of the
+    first image of the first series of each session
+    Args:
+        bids_ds: directory containing the BIDS dataset
+        dcm_dir: directory containing the dcm series of the dataset (pseudo-BIDS organization, see print_patient_sex_and_age)
+        max_workers: number of threads used to walk the dicom directory (see iter_pseudo_bids_series)
+    Returns:
+        df_vendor_scanner_field_strength: one row per session, with columns vendor, scanner, field_strength, TR, TE,
+            spacing_x, spacing_y and spacing_z (raw values, i.e. not harmonized)
+    """
     vendor_scanner_field_strength = []
-    for sub in sorted(os.listdir(bids_ds)):
-        if "sub" in sub and os.path.isdir(os.path.join(bids_ds, sub)):
-            sub_dir_dmc_dir = os.path.join(dcm_dir, sub)
-            if os.path.isdir(sub_dir_dmc_dir):
-                cnt_subs += 1
-                # if cnt_subs % 100 == 0:
-                #     print(f"{cnt_subs}) {sub}:")
-                for ses in sorted(os.listdir(sub_dir_dmc_dir)):
-                    assert os.path.isdir(os.path.join(sub_dir_dmc_dir, ses))
-                    # print(f"    {ses}")
-                    for series in sorted(os.listdir(os.path.join(sub_dir_dmc_dir, ses))):
-                        assert os.path.isdir(os.path.join(sub_dir_dmc_dir, ses, series))
-                        cnt_images = 0
-                        img_position_patient = []
-                        for dcm_img in sorted(os.listdir(os.path.join(sub_dir_dmc_dir, ses, series))):
-                            cnt_images += 1
-                            one_dcm_img = pydicom.dcmread(os.path.join(sub_dir_dmc_dir, ses, series, dcm_img))
-                            manufacturer = one_dcm_img.Manufacturer
-                            model = one_dcm_img.ManufacturerModelName
-                            field_strength = one_dcm_img.MagneticFieldStrength
-                            tr = one_dcm_img.RepetitionTime
-                            te = one_dcm_img.EchoTime
-
-                            sitk_img = sitk.ReadImage(os.path.join(sub_dir_dmc_dir, ses, series, dcm_img))
-                            voxel_spacing = sitk_img.GetSpacing()
-                            spacing_x = round(voxel_spacing[0], 2)
-                            spacing_y = round(voxel_spacing[1], 2)
-                            spacing_z = round(voxel_spacing[2], 2)
-
-                            vendor_scanner_field_strength.append([manufacturer, model, field_strength, tr, te, spacing_x, spacing_y, spacing_z])
-                            break  # we only loop through one image
-                        break  # we only loop through one series
+    dcm_subs = set(list_subdirs(dcm_dir))  # one listing instead of one isdir per subject
+    subs_found = []
+    for sub in list_subdirs(bids_ds):
+        if is_bids_subject_label(sub):
+            if sub in dcm_subs:
+                subs_found.append(sub)
             else:
                 print(f"{sub} missing")
+    # we only look at the first image of the first series of each session
+    for record in iter_pseudo_bids_series(dcm_dir, subs_found, max_workers, max_series_per_session=1, max_files_per_series=1):
+        if record.files:
+            _, acquisition_params = read_acquisition_params_from_dcm(record.files[0])
+            vendor_scanner_field_strength.append(acquisition_params)
 
-    df_vendor_scanner_field_strength = pd.DataFrame(vendor_scanner_field_strength, columns=['vendor', 'scanner', 'field_strength', 'TR', 'TE', 'spacing_x', 'spacing_y', 'spacing_z'])
+    df_vendor_scanner_field_strength = pd.DataFrame(vendor_scanner_field_strength, columns=ACQUISITION_PARAMS_COLUMNS)
+    # pydicom returns DS values as DSfloat objects; cast them so that numeric operations are vectorized
+    df_vendor_scanner_field_strength = df_vendor_scanner_field_strength.astype({column: float for column in ACQUISITION_PARAMS_COLUMNS[2:]})
 
-    # re-adjust weird values
-    df_vendor_scanner_field_strength.loc[df_vendor_scanner_field_strength.field_strength < 1.5, 'field_strength'] = 1.5
-    df_vendor_scanner_field_strength.loc[(df_vendor_scanner_field_strength.field_strength < 3.0) & (df_vendor_scanner_field_strength.field_strength > 2.8), 'field_strength'] = 3.0
-    df_vendor_scanner_field_strength.loc[df_vendor_scanner_field_strength.scanner == 'Trio', 'scanner'] = 'TrioTim'
-    df_vendor_scanner_field_strength.loc[df_vendor_scanner_field_strength.scanner == 'Skyra_fit', 'scanner'] = 'Skyra'
-    df_vendor_scanner_field_strength.loc[df_vendor_scanner_field_strength.scanner == 'Prisma_fit', 'scanner'] = 'Prisma'
-    df_vendor_scanner_field_strength.loc[df_vendor_scanner_field_strength.scanner == 'SymphonyVision', 'scanner'] = 'Symphony'
-    df_vendor_scanner_field_strength.loc[df_vendor_scanner_field_strength.scanner == 'GENESIS_SIGNA', 'scanner'] = 'Signa'
-    df_vendor_scanner_field_strength.loc[df_vendor_scanner_field_strength.scanner == 'Signa HDxt', 'scanner'] = 'Signa'
-    df_vendor_scanner_field_strength.loc[df_vendor_scanner_field_strength.field_strength == 15000, 'field_strength'] = 1.5
+    return df_vendor_scanner_field_strength
 
-    # sort dataframe
-    df_vendor_scanner_field_strength_sorted = df_vendor_scanner_field_strength.sort_values(["vendor", "scanner"], ignore_index=True)  # ignore_index=True re-starts the indexes from 0
 
-    print()
-    print(df_vendor_scanner_field_strength_sorted.value_counts(["vendor", "scanner"]))
-
-    df_intera = df_vendor_scanner_field_strength_sorted.loc[df_vendor_scanner_field_strength_sorted["scanner"] == "Intera"]
-    df_skyra = df_vendor_scanner_field_strength_sorted.loc[df_vendor_scanner_field_strength_sorted["scanner"] == "Skyra"]
-    df_symphony = df_vendor_scanner_field_strength_sorted.loc[df_vendor_scanner_field_strength_sorted["scanner"] == "Symphony"]
-    df_triotim = df_vendor_scanner_field_strength_sorted.loc[df_vendor_scanner_field_strength_sorted["scanner"] == "TrioTim"]
-    df_verio = df_vendor_scanner_field_strength_sorted.loc[df_vendor_scanner_field_strength_sorted["scanner"] == "Verio"]
-    df_aera = df_vendor_scanner_field_strength_sorted.loc[df_vendor_scanner_field_strength_sorted["scanner"] == "Aera"]
-    df_prisma = df_vendor_scanner_field_strength_sorted.loc[df_vendor_scanner_field_strength_sorted["scanner"] == "Prisma"]
-
-    if not df_intera.empty:
-        print_median_values(df_intera, scanner_name="Intera")
-    if not df_skyra.empty:
-        print_median_values(df_skyra, scanner_name="Skyra")
-    if not df_symphony.empty:
-        print_median_values(df_symphony, scanner_name="Symphony")
-    if not df_triotim.empty:
-        print_median_values(df_triotim, scanner_name="TrioTim")
-    if not df_verio.empty:
-        print_median_values(df_verio, scanner_name="Verio")
-    if not df_aera.empty:
-        print_median_values(df_aera, scanner_name="Aera")
-    if not df_prisma.empty:
-        print_median_values(df_prisma, scanner_name="Prisma")
+def harmonize_scanner_table(df_acquisition_params: pd.DataFrame,
+                            scanner_name_map: Optional[dict] = None) -> pd.DataFrame:
+    """This function normalizes scanner names and field strengths with one vectorized pass per column.
+    Scanner names are mapped through a lookup table (names that are not in the table are kept as they are),
+    field strengths stored in Gauss (e.g. 15000) are converted to Tesla, and slightly-off values are snapped to 1.5 T and 3 T.
+    Args:
+        df_acquisition_params: table with (at least) the columns "scanner" and "field_strength"
+        scanner_name_map: dict that maps raw scanner names to harmonized ones; defaults to SCANNER_NAME_MAP
+    Returns:
+        df_harmonized: harmonized copy of the input table
+    """
+    scanner_name_map = SCANNER_NAME_MAP if scanner_name_map is None else scanner_name_map
+    df_harmonized = df_acquisition_params.copy()
+    df_harmonized["scanner"] = df_harmonized["scanner"].replace(scanner_name_map)
+
+    field_strength = df_harmonized["field_strength"].to_numpy(dtype=float)
+    field_strength = np.where(field_strength > 100, field_strength / 10000, field_strength)  # Gauss -> Tesla
+    df_harmonized["field_strength"] = np.select([field_strength < 1.5, (field_strength > 2.8) & (field_strength < 3.0)],
+                                                [1.5, 3.0],
+                                                default=field_strength)
+
+    return df_harmonized
+
+
+def summarize_acquisition_params(df_acquisition_params: pd.DataFrame) -> pd.DataFrame:
+    """This function computes the median acquisition parameters of each (vendor, scanner) pair with one groupby,
+    so that all scanner models present in the table are reported
+    Args:
+        df_acquisition_params: (harmonized) table returned by collect_mr_acquisition_params
+    Returns:
+        df_summary: one row per (vendor, scanner), with the number of series and the median of each parameter
+    """
+    grouped = df_acquisition_params.groupby(["vendor", "scanner"], sort=True)
+    df_summary = grouped[["field_strength", "TR", "TE", "spacing_x", "spacing_y", "spacing_z"]].median()
+    df_summary.insert(0, "nb_series", grouped.size())
+
+    return df_summary
+
+
+@profiled()
+def find_mr_acquisition_params(bids_ds: str,
+                               dcm_dir: str,
+                               scanner_name_map: Optional[dict] = None,
+                               max_workers: int = 8) -> pd.DataFrame:
+    """This function collects the acquisition parameters of a pseudo-BIDS dicom dataset, harmonizes scanner names and
+    field strengths, and returns the median parameters of each scanner
+    Args:
+        bids_ds: directory containing the BIDS dataset
+        dcm_dir: directory containing the dcm series of the dataset (pseudo-BIDS organization, see print_patient_sex_and_age)
+        scanner_name_map: dict that maps raw scanner names to harmonized ones; defaults to SCANNER_NAME_MAP
+        max_workers: number of threads used to walk the dicom directory (see iter_pseudo_bids_series)
+    Returns:
+        df_summary: one row per (vendor, scanner), with the number of series and the median of each parameter
+    """
+    df_vendor_scanner_field_strength = collect_mr_acquisition_params(bids_ds, dcm_dir, max_workers)
+    df_harmonized = harmonize_scanner_table(df_vendor_scanner_field_strength, scanner_name_map)
+    df_summary = summarize_acquisition_params(df_harmonized)
+
+    return df_summary
 
 
+@profiled()
 def print_distribution_sessions_bids_dataset(path_bids_ds: str) -> None:
     all_sub_ses = []
-    for sub in tqdm(sorted(os.listdir(path_bids_ds))):
-        if "sub" in sub and os.path.isdir(os.path.join(path_bids_ds, sub)):
-            cnt_ses = 0
-            for ses in sorted(os.listdir(os.path.join(path_bids_ds, sub))):
-                if "ses" in ses and os.path.isdir(os.path.join(path_bids_ds, sub, ses)):
-                    cnt_ses += 1
-            all_sub_ses.append([sub, cnt_ses])
+    for sub_entry in tqdm(scan_dir_sorted(path_bids_ds)):
+        if is_bids_subject_label(sub_entry.name) and sub_entry.is_dir():  # is_dir() reuses the type info of the listing
+            cnt_ses = sum(1 for ses in list_subdirs(sub_entry.path) if is_bids_session_label(ses))
+            all_sub_ses.append([sub_entry.name, cnt_ses])
 
     df_all_sub_ses = pd.DataFrame(all_sub_ses, columns=['sub', 'ses'])
 
@@ -165,7 +229,8 @@ def print_distribution_sessions_bids_dataset(path_bids_ds: str) -> None:
 
 def convert_age_str2int(age_str: str) -> int:
     """This function converts the age from string to int. It is used when for instance
-    the PatientAge dicom attribute is in the format "075Y"
+    the PatientAge dicom attribute is in the format "075Y". Note that the unit (D/W/M/Y) is ignored;
+    use decode_dcm_ages to convert ages expressed in days, weeks or months
     Example:
         age_str = "075Y"
         age_int = convert_age_str2int(age_str)
@@ -185,6 +250,184 @@ def convert_age_str2int(age_str: str) -> int:
     return age_int
 
 
+def decode_dcm_ages(ages) -> Tuple[np.ndarray, np.ndarray]:
+    """This function decodes a whole column of PatientAge values (DICOM AS format, e.g. "075Y", "006M", "003W", "012D")
+    into ages in years, with one vectorized regex extraction and unit-aware scaling. Values without unit
+    (e.g. 75 or "075") are interpreted as years.
+    Args:
+        ages: PatientAge values (list, numpy array or pandas Series, e.g. a column of a DICOM index table)
+    Returns:
+        ages_years: float array with the ages in years (NaN where the value is invalid)
+        valid_mask: boolean array that is True where the value could be decoded
+    Example:
+        >>> ages_years, valid_mask = decode_dcm_ages(["075Y", "006M", "abc"])
+        >>> ages_years
+        array([75. ,  0.5,  nan])
+    """
+    ages_str = pd.Series(ages, dtype=object).astype(str)
+    extracted = ages_str.str.extract(_DCM_AGE_REGEX)  # column 0: number, column 1: unit
+    numbers = pd.to_numeric(extracted[0], errors="coerce")
+    years_per_unit = extracted[1].str.upper().map(_DCM_AGE_UNIT_TO_YEARS)
+    ages_years = (numbers * years_per_unit).to_numpy(dtype=float)
+    valid_mask = ~np.isnan(ages_years)
+
+    return ages_years, valid_mask
+
+
+def _json_safe_value(value):
+    """This function maps missing values (NaN, pd.NA, NaT) to None, since NaN is not valid json"""
+    if value is pd.NA or value is pd.NaT or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return value
+
+
+class BidsDatasetSummary:
+    """This class holds the summary tables of a pseudo-BIDS dataset (demographics, sessions per subject and acquisition
+    parameters), so that reports, dashboards and CI checks can reuse the result of one scan of the dataset.
+    It is usually created with summarize_bids_dcm_dataset.
+    """
+
+    TABLE_NAMES = ("demographics", "sessions", "acquisition_params")
+
+    def __init__(self,
+                 demographics: pd.DataFrame,
+                 sessions: pd.DataFrame,
+                 acquisition_params: pd.DataFrame,
+                 missing_subjects: Optional[list] = None):
+        """
+        Args:
+            demographics: one row per subject, with columns sub, sex, age (raw PatientAge) and age_years
+            sessions: one row per subject, with columns sub and nb_ses
+            acquisition_params: one row per session, with columns sub, ses and ACQUISITION_PARAMS_COLUMNS (raw values)
+            missing_subjects: subjects of the BIDS dataset that have no dicom directory
+        """
+        self.demographics = demographics
+        self.sessions = sessions
+        self.acquisition_params = acquisition_params
+        self.missing_subjects = list(missing_subjects) if missing_subjects is not None else []
+
+    @property
+    def sex_counts(self) -> pd.Series:
+        """Number of subjects per PatientSex"""
+        return self.demographics["sex"].value_counts()
+
+    @property
+    def age_stats(self) -> pd.Series:
+        """Descriptive statistics of the (valid) ages in years"""
+        return self.demographics["age_years"].describe()
+
+    @property
+    def sessions_distribution(self) -> pd.Series:
+        """Number of subjects per number of sessions"""
+        return self.sessions["nb_ses"].value_counts().sort_index()
+
+    def acquisition_summary(self,
+                            scanner_name_map: Optional[dict] = None) -> pd.DataFrame:
+        """This method returns the harmonized median acquisition parameters of each (vendor, scanner) pair
+        Args:
+            scanner_name_map: dict that maps raw scanner names to harmonized ones; defaults to SCANNER_NAME_MAP
+        Returns:
+            df_summary: see summarize_acquisition_params
+        """
+        return summarize_acquisition_params(harmonize_scanner_table(self.acquisition_params, scanner_name_map))
+
+    def to_json(self,
+                out_path: str) -> None:
+        """This method saves all the tables to one json file; missing values are saved as null
+        Args:
+            out_path: path of the output json file
+        """
+        content = {}
+        for name in self.TABLE_NAMES:
+            table = getattr(self, name)
+            records = [{column: _json_safe_value(value) for column, value in record.items()} for record in table.to_dict(orient="records")]
+            content[name] = {"columns": [str(column) for column in table.columns], "records": records}  # columns: so that empty tables keep them
+        content["missing_subjects"] = self.missing_subjects
+        with open(out_path, "w") as out_file:
+            json.dump(content, out_file, indent=2, default=str, allow_nan=False)
+
+    @classmethod
+    def from_json(cls,
+                  path_json_file: str) -> "BidsDatasetSummary":
+        """This method loads a summary saved with to_json
+        Args:
+            path_json_file: path to json file
+        Returns:
+            summary: loaded summary
+        """
+        with open(path_json_file, "r") as json_file:
+            content = json.load(json_file)
+        tables = {}
+        for name in cls.TABLE_NAMES:
+            table_content = content[name]
+            if isinstance(table_content, list):  # files saved before the columns were stored: list of records only
+                tables[name] = pd.DataFrame.from_records(table_content)
+            else:
+                tables[name] = pd.DataFrame.from_records(table_content["records"], columns=table_content["columns"])
+        summary = cls(**tables, missing_subjects=content.get("missing_subjects"))
+
+        return summary
+
+    def to_parquet(self,
+                   out_dir: str) -> None:
+        """This method saves each table to out_dir/<table_name>.parquet (requires pyarrow or fastparquet)
+        Args:
+            out_dir: output directory; it is created if it does not exist
+        """
+        create_dir_if_not_exist(out_dir)
+        for name in self.TABLE_NAMES:
+            getattr(self, name).to_parquet(os.path.join(out_dir, f"{name}.parquet"), index=False)
+
+
+@profiled()
+def summarize_bids_dcm_dataset(bids_dir: str,
+                               bids_dcm_dir: str,
+                               max_workers: int = 8) -> BidsDatasetSummary:
+    """This function scans a pseudo-BIDS dataset and its dicom directory once and collects demographics,
+    sessions per subject and acquisition parameters (instead of walking the archive once per report with
+    print_patient_sex_and_age, print_distribution_sessions_bids_dataset and find_mr_acquisition_params)
+    Args:
+        bids_dir: directory containing the BIDS dataset
+        bids_dcm_dir: directory containing the dcm series of the dataset (pseudo-BIDS organization, see print_patient_sex_and_age)
+        max_workers: number of threads used to walk the dicom directory (see iter_pseudo_bids_series)
+    Returns:
+        summary: summary tables of the dataset
+    """
+    demographics, sessions, acquisition_params, missing_subjects = [], [], [], []
+    dcm_subs = set(list_subdirs(bids_dcm_dir))
+    subs_found = []
+    for sub_entry in scan_dir_sorted(bids_dir):
+        sub = sub_entry.name
+        if not (is_bids_subject_label(sub) and sub_entry.is_dir()):
+            continue
+        sessions.append([sub, sum(1 for ses in list_subdirs(sub_entry.path) if is_bids_session_label(ses))])
+        if sub in dcm_subs:
+            subs_found.append(sub)
+        else:
+            missing_subjects.append(sub)
+
+    subs_with_demographics = set()
+    # we only look at the first image of the first series of each session
+    for record in iter_pseudo_bids_series(bids_dcm_dir, subs_found, max_workers, max_series_per_session=1, max_files_per_series=1):
+        if not record.files:
+            continue
+        # one header read per session provides both the acquisition parameters and the demographics
+        one_dcm_img, params = read_acquisition_params_from_dcm(record.files[0])
+        acquisition_params.append([record.sub, record.ses] + params)
+        if record.sub not in subs_with_demographics:
+            demographics.append([record.sub, one_dcm_img.get("PatientSex"), one_dcm_img.get("PatientAge")])
+            subs_with_demographics.add(record.sub)
+
+    df_demographics = pd.DataFrame(demographics, columns=["sub", "sex", "age"])
+    df_demographics["age_years"] = decode_dcm_ages(df_demographics["age"])[0]
+    df_sessions = pd.DataFrame(sessions, columns=["sub", "nb_ses"])
+    df_acquisition_params = pd.DataFrame(acquisition_params, columns=["sub", "ses"] + ACQUISITION_PARAMS_COLUMNS)
+    df_acquisition_params = df_acquisition_params.astype({column: float for column in ACQUISITION_PARAMS_COLUMNS[2:]})
+    summary = BidsDatasetSummary(df_demographics, df_sessions, df_acquisition_params, missing_subjects)
+
+    return summary
+
+
 def main():
     # input args
     path_bids_ds = "/path/to/BIDS_Dataset/"
@@ -0,0 +1,83 @@
+import os
+import re
+from functools import lru_cache
+from typing import Iterable, NamedTuple, Optional
+import pandas as pd
+
+# one regex extracts all the entities we care about; other key-value entities (task, rec, dir, ...) are skipped
+_BIDS_FILENAME_BODY_REGEX = (r"sub-(?P<sub>[a-zA-Z0-9]+)"
+                             r"(?:_ses-(?P<ses>[a-zA-Z0-9]+))?"
+                             r"(?:_(?:acq-(?P<acq>[a-zA-Z0-9]+)|run-(?P<run>[0-9]+)|[a-zA-Z]+-[a-zA-Z0-9]+))*"
+                             r"_(?P<suffix>[a-zA-Z0-9]+)"
+                             r"(?P<extension>\.[^\\/]*)?")
+_BIDS_FILENAME_RE = re.compile(_BIDS_FILENAME_BODY_REGEX)
+_BIDS_PATH_REGEX = r"(?:^|[\\/])" + _BIDS_FILENAME_BODY_REGEX + r"$"  # same as above, but for full paths
+_BIDS_SUBJECT_LABEL_RE = re.compile(r"sub-[a-zA-Z0-9]+")
+_BIDS_SESSION_LABEL_RE = re.compile(r"ses-[a-zA-Z0-9]+")
+
+
+class BidsEntities(NamedTuple):
+    """Entities extracted from a BIDS filename (None if the entity is absent)"""
+    sub: str
+    ses: Optional[str]
+    acq: Optional[str]
+    run: Optional[str]
+    suffix: str
+    extension: Optional[str]
+
+
+@lru_cache(maxsize=2 ** 16)
+def parse_bids_filename(file_path: str) -> Optional[BidsEntities]:
+    """This function extracts the BIDS entities (sub, ses, acq, run, suffix, extension) from a file path in one regex pass.
+    Results are memoized, and they are immutable so they can be safely shared between callers.
+    Args:
+        file_path: path to a BIDS file (only the filename is parsed)
+    Returns:
+        entities: extracted entities, or None if the filename does not follow the BIDS naming convention
+    Example:
+        >>> parse_bids_filename("/data/sub-01/ses-20221026/anat/sub-01_ses-20221026_acq-tof_run-1_angio.nii.gz")
+        BidsEntities(sub='01', ses='20221026', acq='tof', run='1', suffix='angio', extension='.nii.gz')
+    """
+    match = _BIDS_FILENAME_RE.fullmatch(os.path.basename(file_path))
+    if match is None:
+        return None
+    entities = BidsEntities(**match.groupdict())
+
+    return entities
+
+
+def parse_bids_filenames(file_paths: Iterable[str]) -> pd.DataFrame:
+    """This function is the vectorized version of parse_bids_filename: it extracts the BIDS entities of many paths at
+    once with pandas' str.extract, which is convenient to index large trees.
+    Args:
+        file_paths: paths to BIDS files (list, numpy array or pandas Series)
+    Returns:
+        df_entities: dataframe with one row per path and columns "path", "sub", "ses", "acq", "run", "suffix"
+            and "extension"; entities that are absent (or rows that are not BIDS filenames) are NaN
+    """
+    paths = pd.Series(file_paths, dtype=object).reset_index(drop=True)
+    df_entities = paths.str.extract(_BIDS_PATH_REGEX)
+    df_entities.insert(0, "path", paths)
+
+    return df_entities
+
+
+def is_bids_subject_label(name: str) -> bool:
+    """This function checks whether name is a BIDS subject label (e.g. "sub-001"). Contrary to a substring check
+    like "sub" in name, it does not match names such as "subjects.tsv" or "sub-001.json".
+    Args:
+        name: directory or file name
+    Returns:
+        True if name is a BIDS subject label; False otherwise
+    """
+    return _BIDS_SUBJECT_LABEL_RE.fullmatch(name) is not None
+
+
+def is_bids_session_label(name: str) -> bool:
+    """This function checks whether name is a BIDS session label (e.g. "ses-20221026").
+    Args:
+        name: directory or file name
+    Returns:
+        True if name is a BIDS session label; False otherwise
+    """
+    return _BIDS_SESSION_LABEL_RE.fullmatch(name) is not None
@@ -0,0 +1,205 @@
+import os
+import json
+import hashlib
+import heapq
+from typing import Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+
+
+def fold_ids_to_folds(fold_ids: np.ndarray,
+                      n_folds: Optional[int] = None) -> List[np.ndarray]:
+    """This function converts a fold-assignment vector (fold_ids[i] = fold of sample i) into a list of sorted index arrays
+    Args:
+        fold_ids: 1D integer array with the fold of each sample
+        n_folds: number of folds; if None, it is inferred from fold_ids
+    Returns:
+        folds: list where the i-th element contains the (sorted) indexes of the samples in the i-th fold
+    """
+    fold_ids = np.asarray(fold_ids)
+    if n_folds is None:
+        n_folds = int(fold_ids.max()) + 1 if fold_ids.size else 0
+    order = np.argsort(fold_ids, kind="stable")  # stable, so indexes inside each fold remain sorted
+    boundaries = np.cumsum(np.bincount(fold_ids, minlength=n_folds))[:-1]
+    folds = np.split(order, boundaries)
+
+    return folds
+
+
+def _smallest_uint_dtype(n_folds: int) -> np.dtype:
+    """This function returns the smallest unsigned int dtype that holds the fold ids 0, ..., n_folds - 1 (e.g. uint32
+    for leave-one-out on more than 65536 samples), so that fold ids never wrap around"""
+    return np.min_scalar_type(max(n_folds - 1, 0))
+
+
+def kfold_fold_ids(n_samples: int,
+                   n_folds: int,
+                   seed: int = 123,
+                   shuffle: bool = True) -> np.ndarray:
+    """This function assigns n_samples to n_folds approximately equal-sized folds. It is the index-based counterpart of
+    split_list_equal_sized_groups: nothing is copied or shuffled in place, and the random generator is local.
+    Args:
+        n_samples: number of samples
+        n_folds: number of folds
+        seed: random seed to use; defaults to 123
+        shuffle: whether to shuffle the samples before splitting them into contiguous folds
+    Returns:
+        fold_ids: array of length n_samples with the fold of each sample
+    Raises:
+        AssertionError: if n_folds is not between 1 and n_samples
+    """
+    assert 1 <= n_folds <= n_samples, f"n_folds must be between 1 and n_samples ({n_samples}). Got {n_folds} instead"
+    positions = np.arange(n_samples)
+    # same boundaries as split_list_equal_sized_groups: fold i spans [round(division * i), round(division * (i + 1)))
+    boundaries = np.round(n_samples / float(n_folds) * np.arange(1, n_folds)).astype(np.int64)
+    fold_of_position = np.searchsorted(boundaries, positions, side="right").astype(_smallest_uint_dtype(n_folds))
+    if shuffle:
+        fold_ids = np.empty_like(fold_of_position)
+        fold_ids[np.random.default_rng(seed).permutation(n_samples)] = fold_of_position
+    else:
+        fold_ids = fold_of_position
+
+    return fold_ids
+
+
+def stratified_kfold_fold_ids(labels: Sequence,
+                              n_folds: int,
+                              seed: int = 123) -> np.ndarray:
+    """This function assigns samples to n_folds folds such that each fold has approximately the same class proportions.
+    Samples are shuffled with a local generator, sorted by label (stable sort), and then dealt round-robin to the folds.
+    Args:
+        labels: label of each sample (list or array)
+        n_folds: number of folds
+        seed: random seed to use; defaults to 123
+    Returns:
+        fold_ids: array of length len(labels) with the fold of each sample
+    Raises:
+        AssertionError: if n_folds is not between 1 and the number of samples
+    """
+    labels = np.asarray(labels)
+    n_samples = labels.shape[0]
+    assert 1 <= n_folds <= n_samples, f"n_folds must be between 1 and n_samples ({n_samples}). Got {n_folds} instead"
+    permutation = np.random.default_rng(seed).permutation(n_samples)
+    order = permutation[np.argsort(labels[permutation], kind="stable")]  # shuffled within each class
+    fold_ids = np.empty(n_samples, dtype=_smallest_uint_dtype(n_folds))
+    fold_ids[order] = np.arange(n_samples) % n_folds  # deal the samples of each class to the folds in turn
+
+    return fold_ids
+
+
+def grouped_kfold_fold_ids(groups: Sequence,
+                           n_folds: int,
+                           seed: int = 123) -> np.ndarray:
+    """This function assigns samples to n_folds folds such that all samples of the same group (e.g. the same subject)
+    end up in the same fold. Groups are shuffled with a local generator and then split into folds of approximately
+    equal number of samples (greedy assignment of each group to the smallest fold, as in scikit-learn's GroupKFold).
+    Args:
+        groups: group (e.g. subject id) of each sample (list or array)
+        n_folds: number of folds
+        seed: random seed to use; defaults to 123
+    Returns:
+        fold_ids: array of length len(groups) with the fold of each sample
+    Raises:
+        AssertionError: if n_folds is not between 1 and the number of groups
+    """
+    unique_groups, group_idx_of_sample, group_sizes = np.unique(np.asarray(groups), return_inverse=True, return_counts=True)
+    n_groups = unique_groups.shape[0]
+    assert 1 <= n_folds <= n_groups, f"n_folds must be between 1 and the number of groups ({n_groups}). Got {n_folds} instead"
+    permutation = np.random.default_rng(seed).permutation(n_groups)
+    # visit the groups from the largest to the smallest (ties in random order) and put each one into the fold
+    # that currently has the fewest samples; this keeps the folds balanced even when group sizes differ a lot
+    visiting_order = permutation[np.argsort(-group_sizes[permutation], kind="stable")]
+    fold_sizes = [(0, fold) for fold in range(n_folds)]  # heap of (nb. samples, fold)
+    fold_of_group = np.empty(n_groups, dtype=_smallest_uint_dtype(n_folds))
+    for group_idx, group_size in zip(visiting_order.tolist(), group_sizes[visiting_order].tolist()):
+        fold_size, fold = fold_sizes[0]
+        fold_of_group[group_idx] = fold
+        heapq.heapreplace(fold_sizes, (fold_size + group_size, fold))
+    fold_ids = fold_of_group[group_idx_of_sample.ravel()]
+
+    return fold_ids
+
+
+def iter_train_test_indexes(fold_ids: np.ndarray) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """This function yields the (train, test) index arrays of each fold, where the test set is the fold itself and
+    the training set contains all the other folds
+    Args:
+        fold_ids: array with the fold of each sample
+    Returns:
+        iterator over (train_idxs, test_idxs) tuples, one per fold
+    """
+    fold_ids = np.asarray(fold_ids)
+    for fold in range(int(fold_ids.max()) + 1 if fold_ids.size else 0):
+        test_mask = fold_ids == fold
+        yield np.flatnonzero(~test_mask), np.flatnonzero(test_mask)
+
+
+def shuffle_arrays_with_same_order(*arrays,
+                                   seed: int = 123) -> tuple:
+    """This function shuffles any number of parallel arrays (or lists) with the same permutation, drawn from a local
+    random generator (the global random state is not touched). It generalizes shuffle_two_lists_with_same_order.
+    Args:
+        arrays: parallel arrays or lists with the same length
+        seed: seed to set for reproducibility
+    Returns:
+        shuffled: tuple with the shuffled version of each input (numpy arrays are gathered with fancy indexing; lists stay lists)
+    Raises:
+        AssertionError: if the input arrays do not have the same length
+    """
+    lengths = {len(array) for array in arrays}
+    assert len(lengths) <= 1, "All input arrays must have the same length"
+    permutation = np.random.default_rng(seed).permutation(lengths.pop() if lengths else 0)
+    shuffled = tuple(array[permutation] if isinstance(array, np.ndarray) else [array[idx] for idx in permutation.tolist()]
+                     for array in arrays)
+
+    return shuffled
+
+
+def save_split_manifest(fold_ids: np.ndarray,
+                        out_path: str,
+                        metadata: Optional[dict] = None) -> str:
+    """This function saves the fold assignment to a compact compressed .npz manifest so that distributed workers can
+    load the same folds instead of recomputing them. The file is written to a temporary path and then atomically renamed,
+    so readers never see a partially written manifest.
+    Args:
+        fold_ids: array with the fold of each sample
+        out_path: path of the output manifest (.npz)
+        metadata: optional json-serializable dict saved along with the folds (e.g. seed, split type, dataset version)
+    Returns:
+        digest: sha256 hex digest of the fold assignment; workers can compare it to check that they agree on the folds
+    """
+    fold_ids = np.ascontiguousarray(fold_ids)
+    digest = hashlib.sha256(fold_ids.tobytes()).hexdigest()
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    if not os.path.exists(out_dir):  # if output folder does not exist
+        os.makedirs(out_dir)  # create it
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as out_file:
+        np.savez_compressed(out_file,
+                            fold_ids=fold_ids,
+                            digest=np.array(digest),
+                            metadata=np.array(json.dumps(metadata if metadata is not None else {})))
+    os.replace(tmp_path, out_path)  # atomic rename
+
+    return digest
+
+
+def load_split_manifest(path_manifest: str) -> Tuple[np.ndarray, dict]:
+    """This function loads a manifest saved with save_split_manifest and checks its integrity
+    Args:
+        path_manifest: path to the .npz manifest
+    Returns:
+        fold_ids: array with the fold of each sample
+        metadata: metadata saved along with the folds
+    Raises:
+        AssertionError: if the manifest does not exist
+        ValueError: if the stored digest does not match the fold assignment
+    """
+    assert os.path.exists(path_manifest), "Path {} does not exist".format(path_manifest)
+    with np.load(path_manifest, allow_pickle=False) as manifest:
+        fold_ids = manifest["fold_ids"]
+        digest = str(manifest["digest"])
+        metadata = json.loads(str(manifest["metadata"]))
+    if hashlib.sha256(np.ascontiguousarray(fold_ids).tobytes()).hexdigest() != digest:
+        raise ValueError(f"Manifest {path_manifest} is corrupted: digest mismatch")
+
+    return fold_ids, metadata
@@ -0,0 +1,107 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from utils_tdinoto.utils_bids_paths import is_bids_subject_label
+
+
+class SeriesRecord(NamedTuple):
+    """One dicom series of a pseudo-BIDS tree (sub-xxx/ses-yyy/series/files)"""
+    sub: str
+    ses: str
+    series: str
+    files: Tuple[str, ...]  # full paths of the files of the series, sorted by name
+
+
+def scan_dir_sorted(dir_path: str) -> List[os.DirEntry]:
+    """This function lists a directory exactly once with os.scandir and returns its entries sorted by name.
+    The entries cache the file type, so calling is_dir()/is_file() on them does not require further system calls
+    on most platforms (which matters on network storage, where every call is a round trip).
+    Args:
+        dir_path: directory to list
+    Returns:
+        entries: sorted entries of the directory (an empty list if the directory does not exist)
+    """
+    try:
+        with os.scandir(dir_path) as iterator:
+            entries = sorted(iterator, key=lambda entry: entry.name)
+    except (FileNotFoundError, NotADirectoryError):
+        entries = []
+
+    return entries
+
+
+def list_subdirs(dir_path: str) -> List[str]:
+    """This function returns the sorted names of the sub-directories of dir_path, listing it only once
+    Args:
+        dir_path: directory to list
+    Returns:
+        subdirs: sorted names of the sub-directories
+    """
+    return [entry.name for entry in scan_dir_sorted(dir_path) if entry.is_dir()]
+
+
+def walk_one_subject(sub_dir: str,
+                     max_series_per_session: Optional[int] = None,
+                     max_files_per_series: Optional[int] = None) -> List[SeriesRecord]:
+    """This function walks the sessions and series of one subject of a pseudo-BIDS dicom tree
+    Args:
+        sub_dir: path to the subject directory (e.g. /dcm_root/sub-000)
+        max_series_per_session: if not None, only the first (sorted) series of each session are listed
+        max_files_per_series: if not None, only the first (sorted) files of each series are kept
+    Returns:
+        records: one record per series
+    """
+    sub = os.path.basename(os.path.normpath(sub_dir))
+    records = []
+    for ses_entry in scan_dir_sorted(sub_dir):
+        if not ses_entry.is_dir():
+            continue
+        series_entries = [entry for entry in scan_dir_sorted(ses_entry.path) if entry.is_dir()]
+        for series_entry in series_entries[:max_series_per_session]:
+            files = [entry.path for entry in scan_dir_sorted(series_entry.path) if entry.is_file()]
+            records.append(SeriesRecord(sub, ses_entry.name, series_entry.name, tuple(files[:max_files_per_series])))
+
+    return records
+
+
+def iter_pseudo_bids_series(dcm_root: str,
+                            subjects: Optional[Iterable[str]] = None,
+                            max_workers: int = 8,
+                            max_series_per_session: Optional[int] = None,
+                            max_files_per_series: Optional[int] = None) -> Iterator[SeriesRecord]:
+    """This function streams the (sub, ses, series, files) records of a pseudo-BIDS dicom tree:
+        sub-000
+            |__ses-yyyymm01
+                  |__dcm_series_1
+                  |__dcm_series_2
+    Each directory is listed exactly once with os.scandir, and subjects are walked concurrently in a thread pool
+    (directory listings release the GIL, so latency-bound storage like NFS benefits the most). At most 2 * max_workers
+    subjects are in flight, so memory stays bounded; records are yielded in sorted subject order.
+    Args:
+        dcm_root: root of the pseudo-BIDS dicom tree
+        subjects: subjects to walk; if None, all the BIDS subject directories of dcm_root are walked
+        max_workers: number of threads; 1 walks the tree sequentially
+        max_series_per_session: if not None, only the first (sorted) series of each session are listed
+        max_files_per_series: if not None, only the first (sorted) files of each series are kept
+    Returns:
+        iterator over the series records
+    """
+    if subjects is None:
+        subjects = [entry.name for entry in scan_dir_sorted(dcm_root) if is_bids_subject_label(entry.name) and entry.is_dir()]
+    sub_dirs = (os.path.join(dcm_root, sub) for sub in subjects)
+    walk_kwargs = {"max_series_per_session": max_series_per_session, "max_files_per_series": max_files_per_series}
+
+    if max_workers <= 1:
+        for sub_dir in sub_dirs:
+            yield from walk_one_subject(sub_dir, **walk_kwargs)
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = deque()  # type: deque
+        for sub_dir in sub_dirs:
+            in_flight.append(executor.submit(walk_one_subject, sub_dir, **walk_kwargs))
+            if len(in_flight) >= 2 * max_workers:  # bounded concurrency
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
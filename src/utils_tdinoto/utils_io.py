@@ -1,4 +1,22 @@
 import os
+import codecs
+import json
+import mmap
+import zlib
+import struct
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional
+import numpy as np
+try:
+    import orjson  # optional: faster json parsing
+except ImportError:
+    orjson = None
+
+_JSON_CACHE = OrderedDict()  # type: OrderedDict # abs path -> ((mtime_ns, size), content), in LRU order
+_JSON_CACHE_LOCK = threading.Lock()
+JSON_CACHE_MAX_ENTRIES = 2 ** 16
 
 
 def create_dir_if_not_exist(dir_to_create: str) -> None:
@@ -8,3 +26,174 @@ def create_dir_if_not_exist(dir_to_create: str) -> None:
     """
     if not os.path.exists(dir_to_create):  # if dir doesn't exist
         os.makedirs(dir_to_create)  # create it
+
+
+def parse_json_file(path_json_file: str) -> dict:
+    """This function loads a json file as dict, using orjson if it is installed and the standard json module otherwise.
+    Args:
+        path_json_file (str): path to json file
+    Returns:
+        content (dict): content of json file
+    """
+    with open(path_json_file, 'rb') as json_file:
+        raw_content = json_file.read()
+    content = orjson.loads(raw_content) if orjson is not None else json.loads(raw_content)
+
+    return content
+
+
+def load_json_file_cached(path_json_file: str) -> dict:
+    """This function loads a json file as dict, and caches the result keyed by path, modification time and size,
+    so that unchanged files (e.g. BIDS sidecars) are not parsed again. The cache is thread-safe and bounded
+    (least recently used entries are evicted first).
+    Args:
+        path_json_file (str): path to json file
+    Returns:
+        content (dict): content of json file; it is shared with the cache, so it must not be modified in place
+    """
+    path_json_file = os.path.abspath(path_json_file)
+    file_stat = os.stat(path_json_file)
+    signature = (file_stat.st_mtime_ns, file_stat.st_size)
+    with _JSON_CACHE_LOCK:
+        cached = _JSON_CACHE.get(path_json_file)
+        if cached is not None and cached[0] == signature:
+            _JSON_CACHE.move_to_end(path_json_file)
+            return cached[1]
+
+    content = parse_json_file(path_json_file)  # parse outside the lock, so that threads parse in parallel
+    with _JSON_CACHE_LOCK:
+        _JSON_CACHE[path_json_file] = (signature, content)
+        _JSON_CACHE.move_to_end(path_json_file)
+        while len(_JSON_CACHE) > JSON_CACHE_MAX_ENTRIES:
+            _JSON_CACHE.popitem(last=False)  # evict least recently used entry
+
+    return content
+
+
+def clear_json_cache() -> None:
+    """This function empties the cache used by load_json_file_cached"""
+    with _JSON_CACHE_LOCK:
+        _JSON_CACHE.clear()
+
+
+def load_json_files_concurrently(paths_json_files: Iterable[str],
+                                 max_workers: int = 8,
+                                 use_cache: bool = True) -> dict:
+    """This function loads many json files (e.g. all the BIDS sidecars of a dataset) concurrently in a thread pool.
+    Args:
+        paths_json_files: paths to json files
+        max_workers (int): number of threads; file reads release the GIL, which helps especially on network storage
+        use_cache (bool): if True, use load_json_file_cached so that unchanged files are not parsed again
+    Returns:
+        contents (dict): dict that maps each input path to the content of the corresponding json file
+    """
+    paths_json_files = list(paths_json_files)
+    loader = load_json_file_cached if use_cache else parse_json_file
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        contents = dict(zip(paths_json_files, executor.map(loader, paths_json_files)))
+
+    return contents
+
+
+def iter_txt_file_lines(path_txt_file: str,
+                        encoding: str = "utf-8",
+                        errors: str = "strict") -> Iterator[str]:
+    """This function lazily yields the lines of a (possibly multi-GB) text file. The file is memory-mapped, so only
+    the pages that are being read are loaded in memory.
+    Args:
+        path_txt_file (str): path to txt file
+        encoding (str): text encoding
+        errors (str): how decoding errors are handled (see bytes.decode)
+    Returns:
+        iterator over the lines of the file (line endings included)
+    """
+    with open(path_txt_file, 'rb') as txt_file:
+        if os.fstat(txt_file.fileno()).st_size == 0:  # empty files cannot be memory-mapped
+            return
+        with mmap.mmap(txt_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            for line in iter(mapped_file.readline, b""):
+                yield line.decode(encoding, errors)
+
+
+def iter_txt_file_chunks(path_txt_file: str,
+                         chunk_size: int = 1 << 20,
+                         encoding: Optional[str] = "utf-8",
+                         errors: str = "strict") -> Iterator:
+    """This function lazily yields a (possibly multi-GB) text file in chunks of chunk_size bytes, so that it can be
+    processed with constant memory. Multi-byte characters split across chunks are decoded correctly.
+    Args:
+        path_txt_file (str): path to txt file
+        chunk_size (int): number of bytes read at a time
+        encoding (str): text encoding; if None, raw bytes are yielded
+        errors (str): how decoding errors are handled (see bytes.decode)
+    Returns:
+        iterator over the chunks of the file
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors) if encoding is not None else None
+    with open(path_txt_file, 'rb') as txt_file:
+        for raw_chunk in iter(lambda: txt_file.read(chunk_size), b""):
+            yield decoder.decode(raw_chunk) if decoder is not None else raw_chunk
+    if decoder is not None:
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+
+def _deflate_block(block: memoryview,
+                   level: int,
+                   zdict: Optional[bytes],
+                   is_last: bool) -> bytes:
+    """This function compresses one block as raw deflate data; non-final blocks end with a sync flush (i.e. on a byte
+    boundary, without the final-block bit), so that the compressed blocks can simply be concatenated"""
+    if zdict:  # the last 32 KB of the previous block, as pigz does, so that the ratio is close to single-stream gzip
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+    return compressor.compress(block) + compressor.flush(zlib.Z_FINISH if is_last else zlib.Z_SYNC_FLUSH)
+
+
+def write_gzip_parallel(data,
+                        out_path: str,
+                        level: int = 6,
+                        nb_threads: Optional[int] = None,
+                        block_size: int = 1 << 20) -> None:
+    """This function writes data to a gzip file compressing blocks in parallel (like pigz). The output is a single,
+    standard gzip member, readable by gzip, nibabel, SimpleITK, etc. zlib releases the GIL, so threads are enough.
+    The file is written to a temporary path and then atomically renamed.
+    Args:
+        data: bytes-like object to compress (bytes, bytearray, numpy array, mmap, ...)
+        out_path: path of the output file (e.g. volume.nii.gz)
+        level: compression level (1 = fastest, 9 = smallest)
+        nb_threads: number of compression threads; defaults to the number of CPUs
+        block_size: number of uncompressed bytes per block
+    """
+    nb_threads = nb_threads or os.cpu_count() or 1
+    tmp_path = f"{out_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    if isinstance(data, np.ndarray):
+        data = np.ascontiguousarray(data)  # memoryview casts are restricted to C-contiguous buffers (e.g. not sliced or transposed arrays)
+    with memoryview(data) as data_view:
+        view = data_view.cast("B") if data_view.format != "B" or data_view.ndim != 1 else data_view
+        starts = list(range(0, len(view), block_size)) or [0]
+        blocks = [view[start: start + block_size] for start in starts]
+        zdicts = [bytes(view[max(start - 32768, 0): start]) for start in starts]
+        last_flags = [idx == len(blocks) - 1 for idx in range(len(blocks))]
+        crc = 0
+        try:
+            with open(tmp_path, "wb") as out_file, ThreadPoolExecutor(max_workers=nb_threads) as executor:
+                out_file.write(b"\x1f\x8b\x08\x00" + struct.pack("<I", 0) + b"\x00\xff")  # gzip header (no name, mtime 0)
+                compressed_blocks = executor.map(_deflate_block, blocks, [level] * len(blocks), zdicts, last_flags)
+                for block, compressed_block in zip(blocks, compressed_blocks):  # in order
+                    crc = zlib.crc32(block, crc)
+                    out_file.write(compressed_block)
+                out_file.write(struct.pack("<II", crc & 0xFFFFFFFF, len(view) & 0xFFFFFFFF))  # gzip trailer
+            os.replace(tmp_path, out_path)  # atomic rename
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        finally:
+            for block in blocks:
+                block.release()  # so that the caller can close an mmap passed as data
+            if view is not data_view:
+                view.release()
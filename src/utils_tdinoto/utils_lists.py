@@ -3,10 +3,12 @@ import pickle
 from collections import Counter
 import glob
 import random
-from typing import Any, Tuple
+from typing import Any, Tuple, Iterable, Iterator, Optional, Sequence
 import operator
+import itertools
 import warnings
 import numpy as np
+from utils_tdinoto.utils_selection import argmax_first, argmin_first
 
 
 def save_list_to_disk_with_pickle(list_to_save: list,
@@ -93,7 +95,7 @@ def most_frequent_n_elements(input_list: list,
         most_frequent_item (*): most frequent item in the list; can be of Any type
     """
     occurrence_count = Counter(input_list)  # type: Counter
-    most_frequent_n_items = occurrence_count.most_common(n)
+    most_frequent_n_items = occurrence_count.most_common(n)  # heap-based (heapq.nlargest) when n is given; all items, sorted, if n is None
 
     return most_frequent_n_items
 
@@ -241,7 +243,7 @@ def first_argmax(input_list: list) -> int:
     Returns:
         idx_max: index corresponding to the maximum value
     """
-    idx_max = input_list.index(max(input_list))
+    idx_max = argmax_first(input_list)  # also accepts numpy arrays and generators
 
     return idx_max
 
@@ -254,7 +256,7 @@ def first_argmin(input_list: list) -> int:
     Returns:
         idx_min: index corresponding to the minimum value
     """
-    idx_min = input_list.index(min(input_list))
+    idx_min = argmin_first(input_list)  # also accepts numpy arrays and generators
 
     return idx_min
 
@@ -339,8 +341,10 @@ def check_if_string_is_in_any_item_of_list(input_list: list,
        match_string: string to match
     Returns:
         list_contains_match_string: True if list contains match_string; False otherwise
+    Note:
+        to search for many strings at once, use MultiPatternMatcher in utils_pattern_matching.py
     """
-    list_contains_match_string = bool([item for item in input_list if (match_string in item)])
+    list_contains_match_string = any(match_string in item for item in input_list)  # stops at the first match
 
     return list_contains_match_string
 
@@ -355,3 +359,101 @@ def all_elements_in_list_are_identical(input_list: list) -> bool:
     all_elements_are_identical = all(x == input_list[0] for x in input_list)
 
     return all_elements_are_identical
+
+
+def iter_flatten(nested: Iterable,
+                 max_depth: Optional[int] = None,
+                 container_types: tuple = (list, tuple)) -> Iterator:
+    """This function lazily flattens the input iterable to an arbitrary depth. Contrary to flatten_list, it never
+    materializes a new list and it does not warn if the input is already flat: flat items are simply yielded as they are.
+    Args:
+        nested: input (possibly nested) iterable that we want to flatten
+        max_depth: maximum number of nesting levels to flatten; if None (default), flatten all levels
+        container_types: types that are descended into; all other items (e.g. strings) are yielded as they are
+    Returns:
+        iterator over the flattened items
+    Example:
+        >>> list(iter_flatten([1, [2, [3, [4]]], (5, 6)]))
+        [1, 2, 3, 4, 5, 6]
+        >>> list(iter_flatten([1, [2, [3, [4]]]], max_depth=1))
+        [1, 2, [3, [4]]]
+    """
+    # explicit stack of iterators instead of recursion, so deep nesting does not hit the recursion limit
+    stack = [iter(nested)]  # type: list
+    while stack:
+        for item in stack[-1]:
+            if isinstance(item, container_types) and (max_depth is None or len(stack) <= max_depth):
+                stack.append(iter(item))  # descend into the sub-container
+                break
+            yield item
+        else:  # the current iterator is exhausted
+            stack.pop()
+
+
+def iter_slice_by_index(seq: Sequence,
+                        indexes: Iterable[int]) -> Iterator:
+    """This function is the lazy counterpart of slice_by_index: it yields the elements of seq located at the input positions.
+    It works with any object that supports positional indexing (e.g. list, tuple, str, numpy array).
+    Args:
+        seq: sequence from which we gather the elements
+        indexes: iterable of 0-based positions to gather (can itself be a generator)
+    Returns:
+        iterator over the gathered elements
+    Example:
+        >>> list(iter_slice_by_index(['a', 'b', 'c'], [0, 2]))
+        ['a', 'c']
+    """
+    getitem = seq.__getitem__  # bind once to avoid the attribute lookup at every iteration
+    return map(getitem, indexes)
+
+
+def iter_chunks(iterable: Iterable,
+                chunk_size: int) -> Iterator[tuple]:
+    """This function splits any iterable (also a generator) into consecutive chunks of chunk_size elements.
+    Only one chunk at a time is held in memory; the last chunk can be shorter.
+    Args:
+        iterable: input iterable that we want to chunk
+        chunk_size: number of elements per chunk
+    Returns:
+        iterator over the chunks (as tuples)
+    Raises:
+        AssertionError: if chunk_size is not a positive integer (checked when the function is called, not at the first next())
+    Example:
+        >>> list(iter_chunks(range(5), 2))
+        [(0, 1), (2, 3), (4,)]
+    """
+    assert chunk_size > 0, "chunk_size must be a positive integer"
+    return _iter_chunks(iter(iterable), chunk_size)
+
+
+def _iter_chunks(iterator: Iterator,
+                 chunk_size: int) -> Iterator[tuple]:
+    chunk = tuple(itertools.islice(iterator, chunk_size))
+    while chunk:
+        yield chunk
+        chunk = tuple(itertools.islice(iterator, chunk_size))
+
+
+def iter_batches(seq: Sequence,
+                 batch_size: int) -> Iterator[Sequence]:
+    """This function splits a sequence into consecutive batches of batch_size elements by slicing it.
+    For numpy arrays the batches are views, so no data is copied; the last batch can be shorter.
+    Args:
+        seq: input sequence (e.g. list, numpy array) that we want to batch
+        batch_size: number of elements per batch
+    Returns:
+        iterator over the batches (same type as seq)
+    Raises:
+        AssertionError: if batch_size is not a positive integer (checked when the function is called, not at the first next())
+    Example:
+        >>> list(iter_batches([1, 2, 3, 4, 5], 2))
+        [[1, 2], [3, 4], [5]]
+    """
+    assert batch_size > 0, "batch_size must be a positive integer"
+    return _iter_batches(seq, batch_size)
+
+
+def _iter_batches(seq: Sequence,
+                  batch_size: int) -> Iterator[Sequence]:
+    for start in range(0, len(seq), batch_size):
+        yield seq[start: start + batch_size]
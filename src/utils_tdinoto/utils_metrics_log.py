@@ -0,0 +1,284 @@
+import io
+import os
+import time
+import numpy as np
+from typing import Dict, Optional, Sequence
+from utils_tdinoto.utils_io import create_dir_if_not_exist
+from utils_tdinoto.utils_numpy import min_max_decimation_indexes
+from utils_tdinoto.utils_plots import new_figure
+from utils_tdinoto.utils_selection import RunningBest
+from matplotlib.ticker import MaxNLocator
+
+
+class MetricsLogReader:
+    """This class incrementally reads a CSV metrics log written by MetricsRecorder, possibly from another process while
+    training is still running: each call only parses the bytes appended since the previous call, and a trailing
+    incomplete line (i.e. a row that is being written) is left for the next call.
+    Example:
+        >>> reader = MetricsLogReader("/path/to/run/metrics.csv")
+        >>> new_rows = reader.read_new_rows()  # array of shape (nb_new_rows, len(reader.columns))
+    """
+
+    def __init__(self,
+                 path_log: str):
+        """
+        Args:
+            path_log: path to the CSV log
+        """
+        self.path_log = path_log
+        self.columns = None  # type: Optional[list] # read from the header
+        self._offset = 0  # position (in bytes) of the first row that has not been read yet
+
+    def read_new_rows(self) -> np.ndarray:
+        """This method parses the complete rows appended to the log since the previous call
+        Returns:
+            rows: float array of shape (nb_new_rows, nb_columns); empty if there are no new rows (or no log yet)
+        """
+        if not os.path.exists(self.path_log):
+            return np.empty((0, len(self.columns) if self.columns else 0))
+        with open(self.path_log, "rb") as log_file:
+            log_file.seek(self._offset)
+            new_bytes = log_file.read()
+        complete_bytes = new_bytes[:new_bytes.rfind(b"\n") + 1]  # skip the row that is being written, if any
+        self._offset += len(complete_bytes)
+        if self.columns is None and complete_bytes:
+            header, _, complete_bytes = complete_bytes.partition(b"\n")
+            self.columns = header.decode("utf-8").split(",")
+        nb_columns = len(self.columns) if self.columns else 0
+        if not complete_bytes:
+            return np.empty((0, nb_columns))
+        rows = np.loadtxt(io.BytesIO(complete_bytes), delimiter=",", ndmin=2, dtype=float)
+
+        return rows
+
+
+class MetricsRecorder:
+    """This class appends one row of metrics per step (e.g. per epoch) to a CSV log on disk, instead of keeping whole
+    metric lists in memory. Rows are buffered and written in blocks of complete lines (every flush_every rows or every
+    flush_interval_s seconds), so that the log can be read by other processes (see MetricsLogReader) while training runs.
+    Optionally, a LiveMetricsPlot is updated with the new rows.
+    Example:
+        >>> with MetricsRecorder("/path/to/run/metrics.csv", ["epoch", "train_loss", "val_loss"]) as recorder:
+        ...     for epoch in range(1, nb_epochs + 1):
+        ...         recorder.append(epoch=epoch, train_loss=train_loss, val_loss=val_loss)
+    """
+
+    def __init__(self,
+                 path_log: str,
+                 columns: Sequence[str],
+                 flush_every: int = 50,
+                 flush_interval_s: float = 5.0,
+                 live_plot: Optional["LiveMetricsPlot"] = None):
+        """
+        Args:
+            path_log: path of the CSV log; if it already exists (e.g. when resuming a run), new rows are appended to it
+            columns: names of the metrics, in the order in which they are written
+            flush_every: maximum number of rows kept in the buffer
+            flush_interval_s: maximum time (in seconds) a row stays in the buffer
+            live_plot: if not None, plot updated with the first column as x axis and the columns of the plot (matched by
+                name, so the plot can track a subset of the metrics, in any order) as curves
+        Raises:
+            ValueError: if the existing log has different columns, or if the live plot has columns that are not logged
+        """
+        self.path_log = path_log
+        self.columns = list(columns)
+        self.flush_every = flush_every
+        self.flush_interval_s = flush_interval_s
+        self.live_plot = live_plot
+        if live_plot is not None:
+            unknown_columns = [column for column in live_plot.columns if column not in self.columns]
+            if unknown_columns:
+                raise ValueError(f"The live plot has columns {unknown_columns} that are not in the logged columns {self.columns}")
+        header = ",".join(self.columns)
+        if os.path.exists(path_log) and os.path.getsize(path_log) > 0:
+            with open(path_log, "r") as log_file:
+                existing_header = log_file.readline().rstrip("\n")
+            if existing_header != header:
+                raise ValueError(f"{path_log} has columns {existing_header}; expected {header}")
+            self._log_file = open(path_log, "a")
+        else:
+            create_dir_if_not_exist(os.path.dirname(os.path.abspath(path_log)))
+            self._log_file = open(path_log, "w")
+            self._log_file.write(header + "\n")
+            self._log_file.flush()
+        self._buffer = []  # type: list # formatted lines that have not been written yet
+        self._last_flush = time.monotonic()
+
+    def append(self,
+               **metrics: float) -> None:
+        """This method adds one row to the log
+        Args:
+            metrics: value of each column (e.g. epoch=3, val_loss=0.25); missing columns are written as NaN
+        """
+        values = [float(metrics.get(column, np.nan)) for column in self.columns]
+        self._buffer.append(",".join(map(repr, values)) + "\n")
+        if self.live_plot is not None:
+            value_by_column = dict(zip(self.columns, values))  # by name, as in LiveMetricsPlot.update_from_reader
+            self.live_plot.add_points([values[0]], [[value_by_column[column] for column in self.live_plot.columns]])
+            self.live_plot.refresh()  # throttled
+        if len(self._buffer) >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval_s:
+            self.flush()
+
+    def flush(self) -> None:
+        """This method writes the buffered rows to disk; rows are written as complete lines"""
+        if self._buffer:
+            self._log_file.write("".join(self._buffer))
+            self._buffer.clear()
+        self._log_file.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        """This method flushes the buffered rows, closes the log and saves the live plot (if any)"""
+        if self._log_file.closed:
+            return
+        self.flush()
+        self._log_file.close()
+        if self.live_plot is not None:
+            self.live_plot.refresh(force=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class _BoundedSeries:
+    """Points of one curve, stored in fixed-size buffers: when the buffers are full, the points are reduced with
+    min_max_decimation_indexes, so memory does not grow with the number of steps while peaks and dips are kept"""
+
+    def __init__(self,
+                 capacity: int):
+        self.capacity = capacity
+        self.x = np.empty(capacity)
+        self.y = np.empty(capacity)
+        self.size = 0
+
+    def extend(self,
+               x_values: np.ndarray,
+               y_values: np.ndarray) -> None:
+        for start in range(0, x_values.shape[0], self.capacity // 2):
+            x_chunk, y_chunk = x_values[start: start + self.capacity // 2], y_values[start: start + self.capacity // 2]
+            if self.size + x_chunk.shape[0] > self.capacity:
+                idxs = min_max_decimation_indexes(self.y[:self.size], max(self.capacity // 8, 1))  # at most ~capacity / 4 points
+                self.size = idxs.shape[0]
+                self.x[:self.size], self.y[:self.size] = self.x[idxs], self.y[idxs]
+            self.x[self.size: self.size + x_chunk.shape[0]] = x_chunk
+            self.y[self.size: self.size + y_chunk.shape[0]] = y_chunk
+            self.size += x_chunk.shape[0]
+
+
+class LiveMetricsPlot:
+    """This class keeps a figure with one curve per metric and updates it incrementally: new points are appended to
+    the existing line artists (the figure is not rebuilt), and the image is re-rendered at most once every
+    min_interval_s seconds. Memory is bounded by max_points per curve, and the best value of each metric is tracked
+    with RunningBest over all the points (not only the displayed ones).
+    Example:
+        >>> live_plot = LiveMetricsPlot("/path/to/run/loss.png", ["train_loss", "val_loss"], best_modes={"val_loss": "min"})
+        >>> reader = MetricsLogReader("/path/to/run/metrics.csv")
+        >>> live_plot.update_from_reader(reader)  # e.g. called periodically by a monitoring process
+    """
+
+    MIN_MAX_POINTS = 16  # smaller buffers cannot hold a decimated series plus a new chunk (see _BoundedSeries)
+
+    def __init__(self,
+                 image_path: str,
+                 columns: Sequence[str],
+                 best_modes: Optional[Dict[str, str]] = None,
+                 x_label: str = "Epochs",
+                 title: str = "Metrics",
+                 max_points: int = 4096,
+                 min_interval_s: float = 10.0):
+        """
+        Args:
+            image_path: path where the figure is saved at each refresh
+            columns: names of the metrics to plot (one curve each)
+            best_modes: dict that maps some of the columns to "min" or "max"; their best value is highlighted with a red circle
+            x_label: label of the x axis
+            title: title of the figure
+            max_points: maximum number of points kept (and drawn) per curve; at least MIN_MAX_POINTS
+            min_interval_s: minimum time (in seconds) between two renderings, unless forced
+        Raises:
+            ValueError: if max_points is smaller than MIN_MAX_POINTS
+        """
+        if max_points < self.MIN_MAX_POINTS:
+            raise ValueError(f"max_points must be at least {self.MIN_MAX_POINTS}. Got {max_points} instead")
+        self.image_path = image_path
+        self.columns = list(columns)
+        self.min_interval_s = min_interval_s
+        self._fig = new_figure()
+        self._ax = self._fig.subplots()
+        self._ax.set_xlabel(x_label)
+        self._ax.xaxis.set_major_locator(MaxNLocator(integer=True))
+        self._fig.suptitle(title, fontsize=16, fontweight='bold')
+        self._series = [_BoundedSeries(max_points) for _ in self.columns]
+        self._lines = [self._ax.plot([], [], label=column)[0] for column in self.columns]
+        best_modes = best_modes if best_modes is not None else {}
+        self._best = {self.columns.index(column): [RunningBest(mode), np.nan, self._ax.plot([], [], 'ro', markersize=10)[0]]
+                      for column, mode in best_modes.items()}  # column idx -> [tracker, x of the best value, marker]
+        self._last_render = -np.inf
+        self._dirty = False
+        create_dir_if_not_exist(os.path.dirname(os.path.abspath(image_path)))
+
+    def add_points(self,
+                   x_values: Sequence[float],
+                   y_rows: Sequence[Sequence[float]]) -> None:
+        """This method appends new points to the curves (the figure is only re-rendered by refresh)
+        Args:
+            x_values: x coordinate of each new row (e.g. epochs)
+            y_rows: one row per x value, with one value per column
+        """
+        x_values = np.asarray(x_values, dtype=float)
+        y_rows = np.asarray(y_rows, dtype=float).reshape(x_values.shape[0], len(self.columns))
+        if x_values.shape[0] == 0:
+            return
+        for column_idx, (series, line) in enumerate(zip(self._series, self._lines)):
+            series.extend(x_values, y_rows[:, column_idx])
+            line.set_data(series.x[:series.size], series.y[:series.size])
+        for column_idx, best in self._best.items():
+            tracker = best[0]
+            for x_value, y_value in zip(x_values.tolist(), y_rows[:, column_idx].tolist()):
+                if tracker.update(y_value):
+                    best[1] = x_value
+            best[2].set_data([best[1]], [tracker.best_value])
+            best[2].set_label(f"{'min' if tracker.mode == 'min' else 'max'} {self.columns[column_idx]} = {tracker.best_value:.4f}")
+        self._dirty = True
+
+    def update_from_reader(self,
+                           reader: MetricsLogReader,
+                           x_column: Optional[str] = None) -> bool:
+        """This method reads the new rows of a metrics log and adds them to the curves, then refreshes the figure
+        Args:
+            reader: reader of the log
+            x_column: column used as x axis; defaults to the first column of the log
+        Returns:
+            rendered: True if the figure was re-rendered
+        """
+        rows = reader.read_new_rows()
+        if rows.shape[0] > 0:
+            x_idx = reader.columns.index(x_column) if x_column is not None else 0
+            self.add_points(rows[:, x_idx], rows[:, [reader.columns.index(column) for column in self.columns]])
+
+        return self.refresh()
+
+    def refresh(self,
+                force: bool = False) -> bool:
+        """This method re-renders and saves the figure if there are new points and at least min_interval_s seconds
+        have passed since the last rendering
+        Args:
+            force: if True, render even if the minimum interval has not passed yet
+        Returns:
+            rendered: True if the figure was re-rendered
+        """
+        now = time.monotonic()
+        if not self._dirty or (not force and now - self._last_render < self.min_interval_s):
+            return False
+        self._ax.relim()
+        self._ax.autoscale_view()
+        if self._ax.get_legend() is None or self._best:  # marker labels change with the best values
+            self._ax.legend(loc="upper right")
+        self._fig.savefig(self.image_path)
+        self._last_render = now
+        self._dirty = False
+
+        return True
@@ -1,36 +1,119 @@
 import os
+import mmap
+import warnings
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import SimpleITK as sitk
 import nibabel as nib
-from typing import Tuple
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple, Union
 import numpy as np
 import pydicom
 from datetime import datetime
 from utils_tdinoto.utils_strings import keep_only_digits
+from utils_tdinoto.utils_profiling import profiled
+from utils_tdinoto.utils_io import write_gzip_parallel
 
+# cache of discovered dicom series: abs dir path -> (dir mtime_ns, {SeriesInstanceUID: sorted file names})
+_DCM_SERIES_CACHE = OrderedDict()  # type: OrderedDict
+_DCM_SERIES_CACHE_LOCK = threading.Lock()
+DCM_SERIES_CACHE_MAX_ENTRIES = 2 ** 12
 
+
+def write_nifti_gz_parallel(image: Union[sitk.Image, nib.Nifti1Image],
+                            out_path: str,
+                            compression_level: int = 6,
+                            nb_threads: Optional[int] = None) -> None:
+    """This function writes a volume as .nii.gz compressing it on several cores (see write_gzip_parallel); the output is
+    a standard gzip stream, and it is written atomically (temporary file + rename)
+    Args:
+        image: volume as sitk.Image or nibabel image (its data array can be non-contiguous, e.g. sliced or transposed)
+        out_path: path of the output .nii.gz file
+        compression_level: gzip compression level (1 = fastest, 9 = smallest); with Python's zlib, level 1 is several
+            times faster than level 6 for files about 10% larger
+        nb_threads: number of compression threads; defaults to the number of CPUs
+    Raises:
+        TypeError: if image is a numpy array (it has no geometry)
+    """
+    if isinstance(image, sitk.Image):
+        # SimpleITK cannot serialize to memory, so we write an uncompressed .nii (fast) and compress its mmapped content
+        tmp_nii_path = f"{out_path}.{os.getpid()}.tmp.nii"
+        try:
+            sitk.WriteImage(image, tmp_nii_path)
+            with open(tmp_nii_path, "rb") as nii_file, mmap.mmap(nii_file.fileno(), 0, access=mmap.ACCESS_READ) as nii_bytes:
+                write_gzip_parallel(nii_bytes, out_path, compression_level, nb_threads)
+        finally:
+            if os.path.exists(tmp_nii_path):
+                os.remove(tmp_nii_path)
+    elif isinstance(image, np.ndarray):
+        raise TypeError("A numpy array has no geometry: wrap it in a nibabel image with its affine, e.g. nib.Nifti1Image(array, affine)")
+    else:
+        write_gzip_parallel(image.to_bytes(), out_path, compression_level, nb_threads)  # to_bytes serializes the data in the on-disk (contiguous) layout
+
+
+def write_image_sitk(image: sitk.Image,
+                     out_path: str,
+                     nb_compression_threads: Optional[int] = None) -> None:
+    """This function writes an image with sitk.WriteImage or, if nb_compression_threads is given and the output is a
+    .nii.gz file, with the parallel gzip writer write_nifti_gz_parallel
+    Args:
+        image: image to write
+        out_path: output path
+        nb_compression_threads: number of compression threads; None uses sitk.WriteImage (single-threaded compression)
+    """
+    if nb_compression_threads is not None and out_path.endswith(".nii.gz"):
+        write_nifti_gz_parallel(image, out_path, nb_threads=nb_compression_threads)
+    else:
+        sitk.WriteImage(image, out_path)
+
+
+def resample_image_sitk(volume: sitk.Image,
+                        new_spacing: Sequence[float],
+                        interpolator: int = sitk.sitkLinear) -> sitk.Image:
+    """This function resamples an in-memory image to a specified voxel spacing (origin and direction are kept)
+    Args:
+        volume: input image
+        new_spacing: desired voxel spacing
+        interpolator: interpolator that we want to use (e.g. 1= NearNeigh., 2=linear, ...)
+    Returns:
+        resampled_volume: resampled image
+    """
+    original_size = volume.GetSize()  # extract size
+    original_spacing = volume.GetSpacing()  # extract spacing
+    new_size = [int(round(osz * ospc / nspc)) for osz, ospc, nspc in zip(original_size, original_spacing, new_spacing)]
+    resampled_volume = sitk.Resample(volume, new_size, sitk.Transform(), interpolator,
+                                     volume.GetOrigin(), list(new_spacing), volume.GetDirection(), 0,
+                                     volume.GetPixelID())
+
+    return resampled_volume
+
+
+@profiled()
 def resample_volume(volume_path: str,
                     new_spacing: list,
                     out_path: str,
-                    interpolator: int = sitk.sitkLinear) -> Tuple[sitk.Image, nib.Nifti1Image, np.ndarray]:
+                    interpolator: int = sitk.sitkLinear,
+                    cache=None,
+                    nb_compression_threads: Optional[int] = None) -> Tuple[sitk.Image, nib.Nifti1Image, np.ndarray]:
     """This function resamples the input volume to a specified voxel spacing
     Args:
         volume_path (str): input volume path
         new_spacing (list): desired voxel spacing that we want
         out_path (str): path where we temporarily save the resampled output volume
         interpolator (int): interpolator that we want to use (e.g. 1= NearNeigh., 2=linear, ...)
+        cache (ResampleCache): if not None, the resampled volume is taken from (or added to) this persistent cache
+            (see utils_resample_cache) and out_path is not used
+        nb_compression_threads (int): if not None and out_path is a .nii.gz file, it is compressed with this number of threads
     Returns:
         resampled_volume_sitk_obj: resampled volume as sitk object
         resampled_volume_nii_obj: resampled volume as nib object
         resampled_volume_nii: resampled volume as numpy array
     """
+    if cache is not None:
+        return cache.resample_volume(volume_path, new_spacing, interpolator)
     volume = sitk.ReadImage(volume_path)  # read volume
-    original_size = volume.GetSize()  # extract size
-    original_spacing = volume.GetSpacing()  # extract spacing
-    new_size = [int(round(osz * ospc / nspc)) for osz, ospc, nspc in zip(original_size, original_spacing, new_spacing)]
-    resampled_volume_sitk_obj = sitk.Resample(volume, new_size, sitk.Transform(), interpolator,
-                                              volume.GetOrigin(), new_spacing, volume.GetDirection(), 0,
-                                              volume.GetPixelID())
-    sitk.WriteImage(resampled_volume_sitk_obj, out_path)  # write sitk volume object to disk
+    resampled_volume_sitk_obj = resample_image_sitk(volume, new_spacing, interpolator)
+    write_image_sitk(resampled_volume_sitk_obj, out_path, nb_compression_threads)  # write sitk volume object to disk
     resampled_volume_nii_obj = nib.load(out_path)  # type: nib.Nifti1Image # load volume as nibabel object
     resampled_volume_nii = np.asanyarray(resampled_volume_nii_obj.dataobj)  # type: np.ndarray # convert from nibabel object to np.array
     os.remove(out_path)  # remove volume from disk to save space
@@ -85,6 +168,28 @@ def remove_zeros_ijk_from_volume(input_volume: np.ndarray) -> np.ndarray:
     return cropped_volume
 
 
+def crop_zeros_image_sitk(input_img: sitk.Image) -> sitk.Image:
+    """This function crops an in-memory image to the bounding box of its nonzero voxels. Contrary to
+    remove_zeros_ijk_from_volume, only the zero rows/columns/slices at the borders are removed, so that the output
+    is still a regular grid and its origin is updated accordingly (i.e. it keeps its physical position).
+    Args:
+        input_img: image to crop
+    Returns:
+        cropped_img: cropped image (the input image if it only contains zeros)
+    """
+    nonzero = sitk.GetArrayViewFromImage(input_img) != 0  # numpy view, axes in (z, y, x) order
+    if not nonzero.any():
+        return input_img
+    bounds = []
+    for axis in range(nonzero.ndim):
+        other_axes = tuple(other_axis for other_axis in range(nonzero.ndim) if other_axis != axis)
+        idxs_nonzero = np.flatnonzero(nonzero.any(axis=other_axes))
+        bounds.append(slice(int(idxs_nonzero[0]), int(idxs_nonzero[-1]) + 1))
+    cropped_img = input_img[tuple(reversed(bounds))]  # sitk indexing is in (x, y, z) order
+
+    return cropped_img
+
+
 def get_axes_orientations_with_nibabel(input_nifti_volume: nib.Nifti1Image) -> tuple:
     """This function returns the axes orientations as a tuple
     Args:
@@ -114,33 +219,219 @@ def get_nibabel_header(input_nifti_volume: nib.Nifti1Image,
     return header
 
 
-def read_dcm_series(dcm_dir: str) -> sitk.Image:
-    """This function reads a dicom series with SimpleITK
+def discover_dcm_series(dcm_dir: str,
+                        use_cache: bool = True) -> Dict[str, Tuple[str, ...]]:
+    """This function finds the dicom series of a directory and their (sorted) files with GDCM. Discovering series
+    requires reading and sorting all the file headers of the directory, so the result is cached per directory and
+    reused as long as the modification time of the directory does not change (i.e. no file was added, removed or renamed).
     Args:
         dcm_dir: directory where dicom files are stored
+        use_cache: if False, the directory is always scanned (and the cache is refreshed)
     Returns:
-        volume_sitk: volume loaded as sitk.Image
+        series_files: dict that maps each SeriesInstanceUID to the sorted paths of its files (empty if there are none)
     """
+    dcm_dir = os.path.abspath(dcm_dir)
+    mtime_ns = os.stat(dcm_dir).st_mtime_ns
+    if use_cache:
+        with _DCM_SERIES_CACHE_LOCK:
+            cached = _DCM_SERIES_CACHE.get(dcm_dir)
+            if cached is not None and cached[0] == mtime_ns:
+                _DCM_SERIES_CACHE.move_to_end(dcm_dir)
+                return cached[1]
+
+    series_files = {series_uid: tuple(sitk.ImageSeriesReader.GetGDCMSeriesFileNames(dcm_dir, series_uid))
+                    for series_uid in sitk.ImageSeriesReader.GetGDCMSeriesIDs(dcm_dir)}
+    with _DCM_SERIES_CACHE_LOCK:
+        _DCM_SERIES_CACHE[dcm_dir] = (mtime_ns, series_files)
+        _DCM_SERIES_CACHE.move_to_end(dcm_dir)
+        while len(_DCM_SERIES_CACHE) > DCM_SERIES_CACHE_MAX_ENTRIES:
+            _DCM_SERIES_CACHE.popitem(last=False)  # evict the least recently used directory
+
+    return series_files
+
+
+def clear_dcm_series_cache() -> None:
+    """This function empties the cache of discover_dcm_series"""
+    with _DCM_SERIES_CACHE_LOCK:
+        _DCM_SERIES_CACHE.clear()
+
+
+def _read_dcm_files(dcm_files: Tuple[str, ...],
+                    nb_threads: Optional[int] = None) -> sitk.Image:
     reader = sitk.ImageSeriesReader()  # create reader
-    dicom_names = reader.GetGDCMSeriesFileNames(dcm_dir)  # read dicom series
-    reader.SetFileNames(dicom_names)
-
+    reader.SetFileNames(dcm_files)
+    if nb_threads is not None:
+        reader.SetNumberOfThreads(nb_threads)
     volume_sitk = reader.Execute()  # extract sitk.Image
 
     return volume_sitk
 
 
+def select_dcm_series_files(dcm_dir: str,
+                            series_uid: Optional[str] = None) -> Tuple[str, ...]:
+    """This function returns the sorted files of one dicom series of a directory (see discover_dcm_series)
+    Args:
+        dcm_dir: directory where dicom files are stored
+        series_uid: SeriesInstanceUID of the series; if None, the directory is expected to contain a single series
+            (if it contains more, a warning is raised and the first series is used, like GetGDCMSeriesFileNames does)
+    Returns:
+        dcm_files: sorted paths of the files of the series
+    Raises:
+        ValueError: if the directory contains no dicom series, or if series_uid is not one of its series
+    """
+    series_files = discover_dcm_series(dcm_dir)
+    if not series_files:
+        raise ValueError(f"No dicom series found in {dcm_dir}")
+    if series_uid is None:
+        series_uid = next(iter(series_files))
+        if len(series_files) > 1:
+            warnings.warn(f"{dcm_dir} contains {len(series_files)} dicom series; only {series_uid} is used. "
+                          f"Pass series_uid, or use read_all_dcm_series to read all of them")
+    elif series_uid not in series_files:
+        raise ValueError(f"Series {series_uid} not found in {dcm_dir}")
+
+    return series_files[series_uid]
+
+
+def read_dcm_series(dcm_dir: str,
+                    series_uid: Optional[str] = None,
+                    nb_threads: Optional[int] = None) -> sitk.Image:
+    """This function reads a dicom series with SimpleITK; the discovered file list is cached (see discover_dcm_series)
+    Args:
+        dcm_dir: directory where dicom files are stored
+        series_uid: SeriesInstanceUID of the series to read; if None, the directory is expected to contain a single
+            series (see select_dcm_series_files)
+        nb_threads: number of threads used by the reader; defaults to SimpleITK's global setting
+    Returns:
+        volume_sitk: volume loaded as sitk.Image
+    """
+    volume_sitk = _read_dcm_files(select_dcm_series_files(dcm_dir, series_uid), nb_threads)
+
+    return volume_sitk
+
+
+def read_all_dcm_series(dcm_dir: str,
+                        nb_threads: Optional[int] = None) -> Dict[str, sitk.Image]:
+    """This function reads every dicom series of a directory as a separate volume
+    Args:
+        dcm_dir: directory where dicom files are stored
+        nb_threads: number of threads used by the reader; defaults to SimpleITK's global setting
+    Returns:
+        volumes: dict that maps each SeriesInstanceUID to its volume
+    """
+    volumes = {series_uid: _read_dcm_files(dcm_files, nb_threads) for series_uid, dcm_files in discover_dcm_series(dcm_dir).items()}
+
+    return volumes
+
+
+class SeriesGeometryReport(NamedTuple):
+    """Geometry of a dicom series computed from the slice headers (see check_dcm_series_geometry)"""
+    nb_slices: int
+    slice_spacing: float  # median distance between consecutive slices along the slice normal (mm)
+    nb_duplicate_slices: int  # slices at the same position as another slice
+    nb_missing_slices: int  # slices missing from gaps larger than the slice spacing
+    gap_positions: Tuple[float, ...]  # positions (mm along the normal) of the slices preceding each gap
+    max_spacing_deviation: float  # largest relative deviation of the regular slice distances from slice_spacing
+    tilt_deg: float  # angle between the slice normal and the stacking direction (e.g. gantry tilt)
+    orientation_is_consistent: bool  # whether all slices have the same ImageOrientationPatient
+    problems: Tuple[str, ...]  # human-readable description of each problem found
+
+    @property
+    def is_ok(self) -> bool:
+        return not self.problems
+
+
+def _read_slice_geometry(path_dcm_img: str) -> Tuple[Optional[list], Optional[list]]:
+    one_dcm_img = pydicom.dcmread(path_dcm_img, stop_before_pixels=True,
+                                  specific_tags=["ImagePositionPatient", "ImageOrientationPatient"])
+
+    return one_dcm_img.get("ImagePositionPatient"), one_dcm_img.get("ImageOrientationPatient")
+
+
+@profiled()
+def check_dcm_series_geometry(dcm_dir_or_files: Union[str, Sequence[str]],
+                              series_uid: Optional[str] = None,
+                              max_workers: int = 8,
+                              spacing_tolerance: float = 0.01,
+                              tilt_tolerance_deg: float = 0.1) -> SeriesGeometryReport:
+    """This function checks the geometry of a dicom series without decoding any pixel: the ImagePositionPatient and
+    ImageOrientationPatient of all the slices are read concurrently (header only), the slice positions are projected
+    onto the slice normal in one vectorized operation, and gaps, duplicates, non-uniform spacing and tilt are reported.
+    It is meant as a cheap pre-flight check before dcm2nii_sitk.
+    Args:
+        dcm_dir_or_files: directory of the series (see select_dcm_series_files) or list of its files
+        series_uid: SeriesInstanceUID of the series, if the directory contains several
+        max_workers: number of threads used to read the headers
+        spacing_tolerance: maximum relative deviation of the distance between consecutive slices from the median one
+        tilt_tolerance_deg: maximum angle (in degrees) between the slice normal and the stacking direction
+    Returns:
+        report: geometry report of the series; report.is_ok is False if any problem was found
+    """
+    dcm_files = select_dcm_series_files(dcm_dir_or_files, series_uid) if isinstance(dcm_dir_or_files, str) else list(dcm_dir_or_files)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        geometries = list(executor.map(_read_slice_geometry, dcm_files))
+    problems = []
+    nb_missing_tags = sum(ipp is None or iop is None for ipp, iop in geometries)
+    if nb_missing_tags > 0:
+        problems.append(f"{nb_missing_tags} slices without ImagePositionPatient/ImageOrientationPatient")
+        geometries = [(ipp, iop) for ipp, iop in geometries if ipp is not None and iop is not None]
+    if not geometries:
+        return SeriesGeometryReport(0, np.nan, 0, 0, (), np.nan, np.nan, False, tuple(problems) or ("no slices",))
+
+    positions_3d = np.array([ipp for ipp, _ in geometries], dtype=float)  # (nb_slices, 3)
+    orientations = np.array([iop for _, iop in geometries], dtype=float)  # (nb_slices, 6)
+    orientation_is_consistent = bool(np.allclose(orientations, orientations[0], atol=1e-4))
+    if not orientation_is_consistent:
+        problems.append("slices have different ImageOrientationPatient")
+    normal = np.cross(orientations[0, :3], orientations[0, 3:])
+    normal /= np.linalg.norm(normal)
+    order = np.argsort(positions_3d @ normal, kind="stable")  # position of each slice along the normal
+    positions_3d = positions_3d[order]
+    slice_positions = positions_3d @ normal
+
+    distances = np.diff(slice_positions)
+    is_duplicate = distances < 1e-3  # mm
+    nb_duplicate_slices = int(np.count_nonzero(is_duplicate))
+    if nb_duplicate_slices > 0:
+        problems.append(f"{nb_duplicate_slices} duplicate slices")
+    distances_no_duplicates = distances[~is_duplicate]
+    slice_spacing, nb_missing_slices, gap_positions, max_spacing_deviation, tilt_deg = np.nan, 0, (), 0.0, 0.0
+    if distances_no_duplicates.size > 0:
+        slice_spacing = float(np.median(distances_no_duplicates))
+        is_gap = distances_no_duplicates > 1.5 * slice_spacing
+        nb_missing_slices = int(np.sum(np.round(distances_no_duplicates[is_gap] / slice_spacing) - 1))
+        gap_positions = tuple(slice_positions[:-1][~is_duplicate][is_gap].tolist())
+        if nb_missing_slices > 0:
+            problems.append(f"{nb_missing_slices} missing slices (gaps after positions {gap_positions})")
+        regular_distances = distances_no_duplicates[~is_gap]
+        max_spacing_deviation = float(np.max(np.abs(regular_distances - slice_spacing)) / slice_spacing) if regular_distances.size else 0.0
+        if max_spacing_deviation > spacing_tolerance:
+            problems.append(f"non-uniform slice spacing (max deviation {100 * max_spacing_deviation:.1f}% of {slice_spacing:.4f} mm)")
+        stacking_direction = positions_3d[-1] - positions_3d[0]
+        cos_angle = abs(stacking_direction @ normal) / np.linalg.norm(stacking_direction)
+        tilt_deg = float(np.degrees(np.arccos(min(cos_angle, 1.0))))
+        if tilt_deg > tilt_tolerance_deg:
+            problems.append(f"tilted slices ({tilt_deg:.2f} degrees)")
+
+    report = SeriesGeometryReport(len(geometries), slice_spacing, nb_duplicate_slices, nb_missing_slices, gap_positions,
+                                  max_spacing_deviation, tilt_deg, orientation_is_consistent, tuple(problems))
+
+    return report
+
+
 def get_sitk_volume_info(path_to_nii_or_dcm: str,
-                         print_info: bool = False) -> dict:
+                         print_info: bool = False,
+                         series_uid: Optional[str] = None) -> dict:
     """This function prints basic info of the input volume
     Args:
         path_to_nii_or_dcm: path to volume that we want to explore
         print_info: whether to print the volume info or no; defaults to False
+        series_uid: if path_to_nii_or_dcm is a directory with several dicom series, SeriesInstanceUID of the one to use
     Returns:
         volume_info: it contains all the main volume information
     """
     if os.path.isdir(path_to_nii_or_dcm):  # if path_to_nii_or_dcm is a directory
-        volume_sitk = read_dcm_series(path_to_nii_or_dcm)
+        volume_sitk = read_dcm_series(path_to_nii_or_dcm, series_uid)
     else:  # if instead path_to_nii_or_dcm is a file
         volume_sitk = sitk.ReadImage(path_to_nii_or_dcm)  # read as sitk Image
 
@@ -173,7 +464,8 @@ def re_orient_to_nib_closest_canonical(path_to_nii_volume: str,
                                        sub: str,
                                        ses: str,
                                        volume_name: str,
-                                       orig_anat_dir: str) -> None:
+                                       orig_anat_dir: str,
+                                       nb_compression_threads: Optional[int] = None) -> None:
     """This function re-orients the input volume to the nibabel closest canonical orientation (i.e. RAS+)
     Args:
         path_to_nii_volume: path to volume that we want to re-oriented
@@ -181,6 +473,7 @@ def re_orient_to_nib_closest_canonical(path_to_nii_volume: str,
         ses: session of interest
         volume_name: name of volume to re-orient
         orig_anat_dir: path to directory containing original TOF volume
+        nb_compression_threads: if not None and the volume is a .nii.gz file, it is compressed with this number of threads
     """
     # load mask volume
     nii_obj = nib.load(path_to_nii_volume)  # load as nibabel object
@@ -191,7 +484,11 @@ def re_orient_to_nib_closest_canonical(path_to_nii_volume: str,
     original_volume_obj = nib.load(original_volume_path)  # load as nibabel object
 
     # save re-oriented mask to disk, OVERWRITING the previous one
-    nib.Nifti1Image(nii_obj.dataobj, original_volume_obj.affine, nii_obj.header).to_filename(path_to_nii_volume)
+    re_oriented_obj = nib.Nifti1Image(nii_obj.dataobj, original_volume_obj.affine, nii_obj.header)
+    if nb_compression_threads is not None and path_to_nii_volume.endswith(".nii.gz"):
+        write_nifti_gz_parallel(re_oriented_obj, path_to_nii_volume, nb_threads=nb_compression_threads)
+    else:
+        re_oriented_obj.to_filename(path_to_nii_volume)
 
 
 def change_dcm_tags_one_derived_image(ds: pydicom.dataset.FileDataset,
@@ -297,14 +594,24 @@ def change_dcm_tags_one_derived_image(ds: pydicom.dataset.FileDataset,
     return ds
 
 
+@profiled()
 def dcm2nii_sitk(in_dcm_dir: str,
                  out_nii_dir: str,
-                 out_name: str) -> bool:
+                 out_name: str,
+                 series_uid: Optional[str] = None,
+                 nb_threads: Optional[int] = None,
+                 check_geometry: bool = False,
+                 nb_compression_threads: Optional[int] = None) -> bool:
     """This function converts a DICOM sequence to a NIfTI file using SimpleITK.
     Args:
         in_dcm_dir: input directory containing the DICOM sequence
         out_nii_dir: output directory where the NIfTI file will be saved
         out_name: name of the NIfTI file
+        series_uid: SeriesInstanceUID of the series to convert, if the directory contains several (see select_dcm_series_files)
+        nb_threads: number of threads used by the reader; defaults to SimpleITK's global setting
+        check_geometry: if True, the slice geometry is checked first (see check_dcm_series_geometry) and the series
+            is not converted if a problem is found (missing/duplicate slices, non-uniform spacing, tilt)
+        nb_compression_threads: if not None, the .nii.gz output is compressed with this number of threads (see write_nifti_gz_parallel)
     Returns:
         conversion_ok: whether the conversion was successful or not
     """
@@ -313,13 +620,14 @@ def dcm2nii_sitk(in_dcm_dir: str,
     # initialize conversion_ok to False; if the conversion is successful, it will be set to True
     conversion_ok = False
 
-    # Load DICOM sequence
-    reader = sitk.ImageSeriesReader()  # type: sitk.ImageSeriesReader # create reader
-    dicom_names = reader.GetGDCMSeriesFileNames(in_dcm_dir)  # type: list # get dicom names
-    reader.SetFileNames(dicom_names)  # set dicom names to reader
     try:
-        image = reader.Execute()  # type: sitk.Image # execute reader to get sitk image
-        sitk.WriteImage(image, os.path.join(out_nii_dir, f"{out_name}.nii.gz"))
+        if check_geometry:
+            geometry_report = check_dcm_series_geometry(in_dcm_dir, series_uid)
+            if not geometry_report.is_ok:
+                print(f"ERROR: {in_dcm_dir} not converted: {'; '.join(geometry_report.problems)}")
+                return conversion_ok
+        image = read_dcm_series(in_dcm_dir, series_uid, nb_threads)  # type: sitk.Image # load DICOM sequence (cached file list)
+        write_image_sitk(image, os.path.join(out_nii_dir, f"{out_name}.nii.gz"), nb_compression_threads)
         conversion_ok = True
         return conversion_ok
     except Exception as e:
@@ -327,19 +635,34 @@ def dcm2nii_sitk(in_dcm_dir: str,
         return conversion_ok
 
 
+def bias_field_correction_image_sitk(input_img: sitk.Image) -> sitk.Image:
+    """This function applies N4 bias field correction to an in-memory image using SimpleITK.
+    Args:
+        input_img: input image
+    Returns:
+        output: corrected image (float32)
+    """
+    mask_img = sitk.OtsuThreshold(input_img, 0, 1, 200)  # create binary mask with Otsu method
+    input_img = sitk.Cast(input_img, sitk.sitkFloat32)  # cast to float32
+    corrector = sitk.N4BiasFieldCorrectionImageFilter()  # create corrector object
+    output = corrector.Execute(input_img, mask_img)  # apply corrector to obtain output image
+
+    return output
+
+
+@profiled()
 def bias_field_correction_sitk(input_img_path: str,
-                               output_path: str) -> None:
+                               output_path: str,
+                               nb_compression_threads: Optional[int] = None) -> None:
     """This function applies bias field correction to the input image using SimpleITK.
     Args:
         input_img_path: path to input image
         output_path: path where the output image will be saved
+        nb_compression_threads: if not None and output_path is a .nii.gz file, it is compressed with this number of threads
     """
     input_img = sitk.ReadImage(input_img_path)  # read image
-    mask_img = sitk.OtsuThreshold(input_img, 0, 1, 200)  # create binary mask with Otsu method
-    input_img = sitk.Cast(input_img, sitk.sitkFloat32)  # cast to float32
-    corrector = sitk.N4BiasFieldCorrectionImageFilter()  # create corrector object
-    output = corrector.Execute(input_img, mask_img)  # apply corrector to obtain output image
-    sitk.WriteImage(output, output_path)  # save output image to output_path
+    output = bias_field_correction_image_sitk(input_img)
+    write_image_sitk(output, output_path, nb_compression_threads)  # save output image to output_path
 
 
 def extract_filename_from_nifti_path(in_nifti_path: str) -> str:
@@ -356,7 +679,8 @@ def extract_filename_from_nifti_path(in_nifti_path: str) -> str:
 
 
 def extract_age_from_dcm_attribute(age: str) -> int:
-    """This function returns the age as an integer from the DICOM attribute PatientAge
+    """This function returns the age as an integer from the DICOM attribute PatientAge. Note that the unit (D/W/M/Y)
+    is ignored; to decode ages in days, weeks or months (or a whole column at once) use decode_dcm_ages in utils_bids_dcm_dataset.py
     Args:
         age: age as a string
     Returns:
@@ -1,5 +1,5 @@
 import numpy as np
-from typing import Any
+from typing import Any, Optional
 
 
 def find_most_frequent_value(input_array: np.ndarray) -> Any:
@@ -176,3 +176,171 @@ def arrays_are_identical(arr_np1: np.ndarray,
     are_identical = np.array_equal(arr_np1, arr_np2)
 
     return are_identical
+
+
+def find_indexes_where_arrays_differ(array1,
+                                     array2,
+                                     chunk_size: Optional[int] = None) -> np.ndarray:
+    """This function is the vectorized counterpart of find_indexes_where_lists_differ: it returns the indexes where the
+    two inputs (lists or arrays) differ. With chunk_size, the inputs are compared one chunk at a time, so that memory-mapped
+    arrays (np.memmap) are never fully loaded into memory.
+    Args:
+        array1: first input list or array
+        array2: second input list or array
+        chunk_size: number of elements compared at a time; if None, the whole inputs are compared at once
+    Returns:
+        idxs: flat indexes (C order) where the two inputs differ; use np.unravel_index to get N-D indexes
+    Raises:
+        ValueError: if the two inputs do not have the same shape
+    """
+    array1, array2 = np.asanyarray(array1), np.asanyarray(array2)
+    if array1.shape != array2.shape:
+        raise ValueError(f"The two inputs must have same shape. Got {array1.shape} and {array2.shape}")
+    array1, array2 = array1.reshape(-1), array2.reshape(-1)  # views for contiguous inputs (e.g. np.memmap), so nothing is loaded
+    if chunk_size is None:
+        return np.flatnonzero(array1 != array2)
+
+    idxs_per_chunk = [np.flatnonzero(array1[start: start + chunk_size] != array2[start: start + chunk_size]) + start
+                      for start in range(0, array1.shape[0], chunk_size)]
+    idxs = np.concatenate(idxs_per_chunk) if idxs_per_chunk else np.empty(0, dtype=np.intp)
+
+    return idxs
+
+
+def group_indexes_by_value(input_array,
+                           values=None,
+                           chunk_size: Optional[int] = None) -> dict:
+    """This function returns, for each distinct value of the input, the indexes where it occurs. It is the vectorized
+    counterpart of calling find_idxs_of_element_in_list once per element: all K elements are found with one stable
+    sort instead of K passes over the input.
+    Args:
+        input_array: input list or 1D array
+        values: optional iterable of values we are interested in; if None, all distinct values are returned.
+            Values that do not occur in the input are mapped to an empty array
+        chunk_size: number of elements processed at a time (useful for np.memmap); if None, the whole input is processed at once
+    Returns:
+        idxs_by_value: dict that maps each value to the (sorted) array of indexes where it occurs
+    """
+    input_array = np.asanyarray(input_array)
+    chunk_size = chunk_size if chunk_size is not None else max(input_array.shape[0], 1)
+    idxs_by_value_chunks = {}  # type: dict
+    for start in range(0, input_array.shape[0], chunk_size):
+        chunk = np.asarray(input_array[start: start + chunk_size])
+        order = np.argsort(chunk, kind="stable")  # stable sort, so that indexes of each value remain sorted
+        unique_values, first_positions = np.unique(chunk[order], return_index=True)
+        for value, idxs in zip(unique_values.tolist(), np.split(order + start, first_positions[1:])):
+            idxs_by_value_chunks.setdefault(value, []).append(idxs)
+
+    if values is None:
+        values = idxs_by_value_chunks.keys()
+    idxs_by_value = {value: np.concatenate(idxs_by_value_chunks[value]) if value in idxs_by_value_chunks
+                     else np.empty(0, dtype=np.intp) for value in values}
+
+    return idxs_by_value
+
+
+def all_elements_are_identical(input_array,
+                               chunk_size: int = 1 << 16) -> bool:
+    """This function is the vectorized counterpart of all_elements_in_list_are_identical. The input is compared to its
+    first element one chunk at a time, and the function returns as soon as a chunk contains a different element.
+    Args:
+        input_array: input list or array (also np.memmap)
+        chunk_size: number of elements compared at a time
+    Returns:
+        all_identical: True if all elements are identical (or the input is empty); False otherwise
+    """
+    input_array = np.asanyarray(input_array)
+    if input_array.shape[0] == 0:
+        return True
+    first_element = input_array[0]
+    for start in range(0, input_array.shape[0], chunk_size):
+        if not np.all(input_array[start: start + chunk_size] == first_element):
+            return False  # early exit
+
+    return True
+
+
+def min_max_decimation_indexes(values,
+                               nb_buckets: int) -> np.ndarray:
+    """This function selects the points to keep when drawing a long 1D series with a limited number of pixels: the
+    series is split into nb_buckets contiguous buckets and, for each bucket, the positions of its minimum and of its
+    maximum are kept (plus the first and last points). Since a line plot cannot show more than the vertical extent of
+    each pixel column, the decimated series looks the same as the full one (peaks and dips included) while having at
+    most 2 * nb_buckets + 2 points. The computation is vectorized (one reshape and one argmin/argmax per bucket row).
+    Args:
+        values: 1D list or array
+        nb_buckets: number of buckets (e.g. the width of the plot in pixels)
+    Returns:
+        idxs: sorted indexes of the points to keep (all the indexes if the series is short enough); NaNs (e.g. a diverged
+            loss) are ignored when looking for the extremes of a bucket, unless the whole bucket is NaN
+    """
+    values = np.asarray(values)
+    nb_values = values.shape[0]
+    if nb_values <= 2 * nb_buckets + 2:
+        return np.arange(nb_values)
+    values_for_min, values_for_max = values, values
+    if values.dtype.kind == "f":
+        is_nan = np.isnan(values)
+        if is_nan.any():  # argmin/argmax would return the position of the NaN; all-NaN buckets return their first point
+            values_for_min, values_for_max = np.where(is_nan, np.inf, values), np.where(is_nan, -np.inf, values)
+    bucket_size = -(-nb_values // nb_buckets)  # ceil division
+    nb_full_buckets = nb_values // bucket_size
+    end_full_buckets = nb_full_buckets * bucket_size
+    offsets = np.arange(nb_full_buckets) * bucket_size
+    kept = [np.array([0, nb_values - 1]),
+            offsets + values_for_min[:end_full_buckets].reshape(nb_full_buckets, bucket_size).argmin(axis=1),
+            offsets + values_for_max[:end_full_buckets].reshape(nb_full_buckets, bucket_size).argmax(axis=1)]
+    if end_full_buckets < nb_values:  # last, shorter, bucket
+        kept.append(end_full_buckets + np.array([values_for_min[end_full_buckets:].argmin(), values_for_max[end_full_buckets:].argmax()]))
+    idxs = np.unique(np.concatenate(kept))  # sorted and without duplicates
+
+    return idxs
+
+
+def one_hot_encode(labels,
+                   nb_classes: Optional[int] = None,
+                   classes=None,
+                   sparse: bool = False,
+                   dtype=np.uint8):
+    """This function converts integer labels into a one-hot (i.e. binarized) matrix using numpy only. It replaces
+    torch.nn.functional.one_hot(...).numpy(), so that torch is not needed to binarize labels.
+    Args:
+        labels: 1D list or array of labels; if classes is None, they must be integers in [0, nb_classes)
+        nb_classes: number of classes; if None, it is inferred as max(labels) + 1 (or len(classes))
+        classes: optional list of the possible label values (e.g. ["AD", "CN", "MCI"]); column i corresponds to the
+            i-th of the sorted classes, like scikit-learn's label_binarize
+        sparse: if True, return a scipy.sparse CSR matrix, which only stores one value per sample (useful with many classes)
+        dtype: data type of the output
+    Returns:
+        one_hot: array (or CSR matrix) of shape (nb_samples, nb_classes), with a single 1 per row
+    Raises:
+        ValueError: if some labels are outside [0, nb_classes) or are not in classes
+        ImportError: if sparse is True and scipy is not installed
+    """
+    labels = np.asarray(labels).ravel()
+    if classes is not None:
+        sorted_classes = np.unique(np.asarray(classes))
+        codes = np.searchsorted(sorted_classes, labels)
+        codes_clipped = np.minimum(codes, max(sorted_classes.shape[0] - 1, 0))
+        if sorted_classes.shape[0] == 0 or np.any(sorted_classes[codes_clipped] != labels):
+            raise ValueError("Some labels are not in classes")
+        labels = codes
+        nb_classes = sorted_classes.shape[0] if nb_classes is None else nb_classes
+    elif nb_classes is None:
+        nb_classes = int(labels.max()) + 1 if labels.size else 0
+    if labels.size and (labels.min() < 0 or labels.max() >= nb_classes):
+        raise ValueError(f"Labels must be in [0, {nb_classes}). Got values in [{labels.min()}, {labels.max()}] instead")
+    labels = labels.astype(np.intp, copy=False)
+    nb_samples = labels.shape[0]
+    if sparse:
+        try:
+            import scipy.sparse as scipy_sparse  # optional, imported lazily to keep the import of this module fast
+        except ImportError:
+            raise ImportError("scipy is required for sparse=True (pip install scipy)")
+        one_hot = scipy_sparse.csr_matrix((np.ones(nb_samples, dtype=dtype), labels, np.arange(nb_samples + 1)),
+                                          shape=(nb_samples, nb_classes))
+    else:
+        one_hot = np.zeros((nb_samples, nb_classes), dtype=dtype)
+        one_hot[np.arange(nb_samples), labels] = 1
+
+    return one_hot
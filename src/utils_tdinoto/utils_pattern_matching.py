@@ -0,0 +1,148 @@
+import re
+from typing import Iterable, Iterator, List, Optional, Set
+
+
+def _build_trie(patterns: Iterable[str]) -> dict:
+    """This function builds a character trie from the input patterns; the key "" marks the end of a pattern
+    Args:
+        patterns: input patterns
+    Returns:
+        trie: nested dict where each key is a character and each value is the sub-trie
+    """
+    trie = {}  # type: dict
+    for pattern in patterns:
+        node = trie
+        for char in pattern:
+            node = node.setdefault(char, {})
+        node[""] = {}  # end-of-pattern marker
+
+    return trie
+
+
+def _trie_to_regex(node: dict) -> str:
+    """This function converts a (sub-)trie into a regex. Alternatives at each node are single characters, so the regex
+    engine never re-tries a shared prefix; since optional groups are greedy, the longest pattern is matched first.
+    Args:
+        node: (sub-)trie built with _build_trie
+    Returns:
+        regex: regex string matching all the patterns of the trie
+    """
+    alternatives = [re.escape(char) + _trie_to_regex(child) for char, child in sorted(node.items()) if char != ""]
+    if not alternatives:
+        return ""
+    regex = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+    if "" in node:  # a pattern ends here, so the continuation is optional
+        regex = "(?:" + regex + ")?"
+
+    return regex
+
+
+class MultiPatternMatcher:
+    """This class compiles many substring patterns at once into a single trie-shaped regex, so that each string of
+    the corpus is scanned only once (inside the C regex engine) regardless of the number of patterns. The compiled
+    matcher can be reused across calls.
+    Example:
+        >>> matcher = MultiPatternMatcher(["TOF", "T1", "T1w"])
+        >>> matcher.matches_any(["sub-01_T2w", "sub-02_TOF"])
+        True
+        >>> matcher.matching_items(["sub-01_T2w", "sub-02_TOF", "sub-03_T1w"])
+        [1, 2]
+        >>> matcher.patterns_per_item(["sub-03_T1w", "sub-04"])
+        [{'T1', 'T1w'}, set()]
+    """
+
+    def __init__(self,
+                 patterns: Iterable[str],
+                 ignore_case: bool = False):
+        """
+        Args:
+            patterns: substrings that we want to search for
+            ignore_case: if True, matching is case-insensitive: patterns and strings are compared after str.casefold()
+                (e.g. "ß" matches "SS"), and patterns that differ only in case are all reported
+        Raises:
+            ValueError: if patterns is empty or contains an empty string
+        """
+        self.patterns = list(dict.fromkeys(patterns))  # remove duplicates but keep the order
+        if not self.patterns or "" in self.patterns:
+            raise ValueError("patterns must be a non-empty collection of non-empty strings")
+        self.ignore_case = ignore_case
+        keys = [self._normalize(pattern) for pattern in self.patterns]
+        self._patterns_by_key = {}  # type: dict # several patterns can have the same key if ignore_case (e.g. "ABC" and "abc")
+        for key, pattern in zip(keys, self.patterns):
+            self._patterns_by_key.setdefault(key, set()).add(pattern)
+        # when the longest pattern starting at one position matches, all the patterns that are its prefixes match too
+        self._prefix_keys = {key: {key[:end] for end in range(1, len(key) + 1) if key[:end] in self._patterns_by_key}
+                             for key in keys}
+        # no re.IGNORECASE: its case folding differs from str.lower/casefold for some characters (e.g. "ſ"), so the
+        # corpus is casefolded instead, and the matched text is then always a key
+        trie_regex = _trie_to_regex(_build_trie(keys))
+        self._search = re.compile(trie_regex).search
+        self._finditer = re.compile(f"(?=({trie_regex}))").finditer  # lookahead: one match per position
+
+    def _normalize(self,
+                   text: str) -> str:
+        return text.casefold() if self.ignore_case else text
+
+    def _normalize_corpus(self,
+                          corpus: Iterable[str]) -> Iterable[str]:
+        return map(str.casefold, corpus) if self.ignore_case else corpus
+
+    def matches_any(self,
+                    corpus: Iterable[str]) -> bool:
+        """This method returns True as soon as one string of the corpus contains one of the patterns (early exit)
+        Args:
+            corpus: strings where we search for the patterns
+        Returns:
+            True if at least one string contains at least one pattern; False otherwise
+        """
+        return any(map(self._search, self._normalize_corpus(corpus)))
+
+    def iter_matching_items(self,
+                            corpus: Iterable[str]) -> Iterator[int]:
+        """This method lazily yields the indexes of the strings that contain at least one pattern; it can be stopped
+        early, e.g. with next() to only retrieve the first matching item
+        Args:
+            corpus: strings where we search for the patterns
+        Returns:
+            iterator over the indexes of the matching strings
+        """
+        search = self._search
+        return (idx for idx, item in enumerate(self._normalize_corpus(corpus)) if search(item))
+
+    def matching_items(self,
+                       corpus: Iterable[str],
+                       max_items: Optional[int] = None) -> List[int]:
+        """This method returns the indexes of the strings that contain at least one pattern
+        Args:
+            corpus: strings where we search for the patterns
+            max_items: if not None, stop after max_items matching strings have been found
+        Returns:
+            idxs: indexes of the matching strings
+        """
+        idxs = []  # type: list
+        for idx in self.iter_matching_items(corpus):
+            idxs.append(idx)
+            if max_items is not None and len(idxs) >= max_items:
+                break
+
+        return idxs
+
+    def patterns_per_item(self,
+                          corpus: Iterable[str]) -> List[Set[str]]:
+        """This method returns, for each string of the corpus, the set of patterns that it contains (overlapping matches included)
+        Args:
+            corpus: strings where we search for the patterns
+        Returns:
+            out_list: list with one set of patterns per string (an empty set if the string contains no pattern)
+        """
+        finditer, prefix_keys, patterns_by_key = self._finditer, self._prefix_keys, self._patterns_by_key
+        out_list = []
+        for item in self._normalize_corpus(corpus):
+            keys = set()  # type: set
+            for match in finditer(item):
+                matched_text = match.group(1)
+                if matched_text:
+                    keys |= prefix_keys[matched_text]
+            out_list.append({pattern for key in keys for pattern in patterns_by_key[key]})
+
+        return out_list
@@ -0,0 +1,188 @@
+import os
+import time
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+import SimpleITK as sitk
+from utils_tdinoto.utils_io import create_dir_if_not_exist
+from utils_tdinoto.utils_profiling import span
+from utils_tdinoto.utils_nifti_dicom import read_dcm_series, resample_image_sitk, bias_field_correction_image_sitk, crop_zeros_image_sitk, write_image_sitk
+
+
+class PipelineStage(NamedTuple):
+    """One stage of an ImagePipeline: func takes a sitk.Image and returns a sitk.Image"""
+    name: str
+    func: Callable[[sitk.Image], sitk.Image]
+    checkpoint: bool = False  # if True, the output of the stage is also written to disk (when a checkpoint dir is given)
+
+
+class PipelineResult(NamedTuple):
+    """Outcome of ImagePipeline.run for one input"""
+    out_path: Optional[str]
+    timings: Dict[str, float]  # stage name -> wall time in seconds (also "load" and "write")
+
+
+def load_image(input_image: Union[str, sitk.Image]) -> sitk.Image:
+    """This function loads the input of a pipeline: a sitk.Image is returned as is, a directory is read as a
+    dicom series (see read_dcm_series) and any other path is read with sitk.ReadImage (e.g. a nifti file)
+    Args:
+        input_image: image, dicom directory or image path
+    Returns:
+        image: loaded image
+    """
+    if isinstance(input_image, sitk.Image):
+        return input_image
+    if os.path.isdir(input_image):
+        return read_dcm_series(input_image)
+
+    return sitk.ReadImage(input_image)
+
+
+def write_image(image: sitk.Image,
+                out_path: str,
+                nb_compression_threads: Optional[int] = None) -> None:
+    """This function writes an image to disk, creating the output directory if needed
+    Args:
+        image: image to write
+        out_path: output path (the format is inferred from the extension, e.g. .nii.gz)
+        nb_compression_threads: if not None, .nii.gz outputs are compressed with this number of threads (see write_image_sitk)
+    """
+    create_dir_if_not_exist(os.path.dirname(os.path.abspath(out_path)))
+    write_image_sitk(image, out_path, nb_compression_threads)
+
+
+class ImagePipeline:
+    """This class chains image-level stages (e.g. bias field correction, resampling, cropping) and passes the
+    intermediate sitk.Image objects between them in memory, so that only the final output (and, optionally, some
+    checkpoints) is written to disk instead of one compressed file per stage. The wall time of each stage is returned
+    and also recorded as a span of the package-wide profiler (see utils_profiling), when it is enabled.
+    Example:
+        >>> pipeline = standard_preprocessing_pipeline(new_spacing=[0.5, 0.5, 0.8])
+        >>> result = pipeline.run("/path/to/dcm_series", "/path/to/out/sub-001_angio.nii.gz")
+        >>> results = run_pipeline_on_subjects(pipeline, [(dcm_dir, out_path) for dcm_dir, out_path in jobs], max_workers=4)
+    """
+
+    def __init__(self,
+                 stages: Sequence[Union[PipelineStage, Tuple[str, Callable]]],
+                 nb_compression_threads: Optional[int] = None):
+        """
+        Args:
+            stages: stages to apply, in order; (name, func) tuples are also accepted. To run the pipeline in worker
+                processes (see run_pipeline_on_subjects), the funcs must be picklable, i.e. module-level functions or
+                functools.partial objects, not lambdas
+            nb_compression_threads: if not None, .nii.gz outputs and checkpoints are compressed with this number of threads
+        Raises:
+            ValueError: if two stages have the same name
+        """
+        self.stages = [stage if isinstance(stage, PipelineStage) else PipelineStage(*stage) for stage in stages]
+        names = [stage.name for stage in self.stages]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Stage names must be unique. Got {names} instead")
+        self.nb_compression_threads = nb_compression_threads
+
+    def run(self,
+            input_image: Union[str, sitk.Image],
+            out_path: Optional[str] = None,
+            checkpoint_dir: Optional[str] = None) -> PipelineResult:
+        """This method applies all the stages to one input
+        Args:
+            input_image: image, dicom directory or image path (see load_image)
+            out_path: path of the final output; if None, the final output is not written (use run_to_image to get it)
+            checkpoint_dir: if not None, the outputs of the stages with checkpoint=True are written to this dir as <stage name>.nii.gz
+        Returns:
+            result: output path and per-stage wall times
+        """
+        _, result = self._run(input_image, out_path, checkpoint_dir)
+
+        return result
+
+    def run_to_image(self,
+                     input_image: Union[str, sitk.Image]) -> sitk.Image:
+        """This method applies all the stages to one input and returns the output image without writing it
+        Args:
+            input_image: image, dicom directory or image path (see load_image)
+        Returns:
+            image: output of the last stage
+        """
+        image, _ = self._run(input_image, None, None)
+
+        return image
+
+    def _run(self,
+             input_image: Union[str, sitk.Image],
+             out_path: Optional[str],
+             checkpoint_dir: Optional[str]) -> Tuple[sitk.Image, PipelineResult]:
+        timings = {}
+        start = time.perf_counter()
+        with span("pipeline/load"):
+            image = load_image(input_image)
+        timings["load"] = time.perf_counter() - start
+        for stage in self.stages:
+            start = time.perf_counter()
+            with span(f"pipeline/{stage.name}"):
+                image = stage.func(image)
+            timings[stage.name] = time.perf_counter() - start
+            if stage.checkpoint and checkpoint_dir is not None:
+                write_image(image, os.path.join(checkpoint_dir, f"{stage.name}.nii.gz"), self.nb_compression_threads)
+        if out_path is not None:
+            start = time.perf_counter()
+            with span("pipeline/write"):
+                write_image(image, out_path, self.nb_compression_threads)
+            timings["write"] = time.perf_counter() - start
+
+        return image, PipelineResult(out_path, timings)
+
+
+def standard_preprocessing_pipeline(new_spacing: Optional[Sequence[float]] = None,
+                                    interpolator: int = sitk.sitkLinear,
+                                    bias_field_correction: bool = True,
+                                    crop_zeros: bool = True) -> ImagePipeline:
+    """This function builds the in-memory counterpart of our usual chain dcm2nii_sitk -> bias_field_correction_sitk ->
+    resample_volume -> remove_zeros_ijk_from_volume (the conversion is the loading step of the pipeline). Note that the
+    cropping stage removes the zero borders only (see crop_zeros_image_sitk), so the output keeps a valid geometry.
+    Args:
+        new_spacing: desired voxel spacing; if None, the image is not resampled
+        interpolator: interpolator used for the resampling
+        bias_field_correction: whether to apply N4 bias field correction
+        crop_zeros: whether to crop the image to the bounding box of its nonzero voxels
+    Returns:
+        pipeline: the pipeline
+    """
+    stages = []
+    if bias_field_correction:
+        stages.append(PipelineStage("bias_field_correction", bias_field_correction_image_sitk))
+    if new_spacing is not None:
+        stages.append(PipelineStage("resample", functools.partial(resample_image_sitk, new_spacing=list(new_spacing), interpolator=interpolator)))
+    if crop_zeros:
+        stages.append(PipelineStage("crop_zeros", crop_zeros_image_sitk))
+
+    return ImagePipeline(stages)
+
+
+def _init_worker(nb_threads_per_worker: Optional[int]) -> None:
+    if nb_threads_per_worker is not None:  # avoid oversubscribing the cores with ITK threads
+        sitk.ProcessObject.SetGlobalDefaultNumberOfThreads(nb_threads_per_worker)
+
+
+def _run_one_job(pipeline: ImagePipeline,
+                 job: Tuple) -> PipelineResult:
+    return pipeline.run(*job)
+
+
+def run_pipeline_on_subjects(pipeline: ImagePipeline,
+                             jobs: Sequence[Tuple],
+                             max_workers: Optional[int] = None,
+                             nb_threads_per_worker: Optional[int] = 1) -> List[PipelineResult]:
+    """This function runs a pipeline on many subjects in parallel worker processes
+    Args:
+        pipeline: pipeline to run (its stage funcs must be picklable)
+        jobs: one tuple of arguments of ImagePipeline.run per subject, i.e. (input_image, out_path[, checkpoint_dir])
+        max_workers: number of processes; defaults to the number of CPUs
+        nb_threads_per_worker: number of ITK threads in each process; None keeps SimpleITK's default (all cores)
+    Returns:
+        results: result of each job, in the same order as jobs
+    """
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(nb_threads_per_worker,)) as executor:
+        results = list(executor.map(functools.partial(_run_one_job, pipeline), jobs))
+
+    return results
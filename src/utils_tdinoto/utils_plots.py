@@ -1,12 +1,83 @@
-import matplotlib.pyplot as plt
 import numpy as np
-from typing import Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Optional, Tuple
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from sklearn.metrics import roc_curve, auc
 from utils_tdinoto.utils_io import create_dir_if_not_exist
 import os
 from matplotlib.ticker import MaxNLocator
-from utils_tdinoto.utils_lists import first_argmin, first_argmax
-import torch
+from utils_tdinoto.utils_numpy import min_max_decimation_indexes, one_hot_encode
+
+
+def new_figure(figsize: Optional[Tuple[float, float]] = None) -> Figure:
+    """This function creates a figure attached to an Agg canvas without going through pyplot. Contrary to
+    plt.subplots(), the figure is not registered in pyplot's global figure manager, so it is freed as soon as it is
+    no longer referenced (no "too many open figures" warning and no memory growth in long-running processes), and
+    it works in headless environments without selecting a backend.
+    Args:
+        figsize: (width, height) of the figure in inches; defaults to matplotlib's rcParams
+    Returns:
+        fig: new figure
+    """
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)  # attach the canvas used by fig.savefig
+
+    return fig
+
+
+def save_and_release_figure(fig: Figure,
+                            out_path: str) -> None:
+    """This function saves a figure created with new_figure and then clears it, which breaks the reference cycles
+    between the figure and its artists so that their memory is released immediately rather than at the next garbage collection
+    Args:
+        fig: figure to save
+        out_path: path of the output image
+    """
+    fig.savefig(out_path)
+    fig.clear()
+
+
+def _plot_decimated(ax,
+                    x_axis: np.ndarray,
+                    values: np.ndarray,
+                    max_points: int,
+                    *args,
+                    **kwargs) -> None:
+    """This function plots values against x_axis after reducing them to at most ~max_points points with
+    min_max_decimation_indexes, so that long series are drawn quickly and saved as small files"""
+    idxs = min_max_decimation_indexes(values, max(max_points // 2, 1))
+    ax.plot(x_axis[idxs], values[idxs], *args, **kwargs)
+
+
+def _default_max_points(fig: Figure) -> int:
+    return 2 * int(fig.get_figwidth() * fig.dpi)  # min and max of each pixel column
+
+
+def _call_plot_function(job: Tuple[Callable, dict]):
+    plot_function, kwargs = job
+    return plot_function(**kwargs)
+
+
+def render_plots_in_parallel(plot_function: Callable,
+                             kwargs_list: Iterable[dict],
+                             max_workers: Optional[int] = None,
+                             chunksize: int = 1) -> list:
+    """This function renders a batch of plots (e.g. the loss curves of many runs) across a pool of processes;
+    rendering is CPU-bound, so processes (and not threads) are needed to use more than one core
+    Args:
+        plot_function: module-level (i.e. picklable) plotting function, e.g. save_loss_curves
+        kwargs_list: keyword arguments of each call of plot_function
+        max_workers: number of processes; defaults to the number of CPUs
+        chunksize: number of calls sent to a worker at once; increase it for many small plots
+    Returns:
+        results: return values of the calls, in the same order as kwargs_list
+    """
+    jobs = [(plot_function, kwargs) for kwargs in kwargs_list]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(_call_plot_function, jobs, chunksize=chunksize))
+
+    return results
 
 
 def plot_roc_curve(flat_y_test: list,
@@ -26,8 +97,8 @@ def plot_roc_curve(flat_y_test: list,
         cv_folds: number of folds in the cross-validation
         out_path: path where we save the figure
         legend_label: label to use in the legend
-        plot: if True, the ROC curve will be displayed
-        save: if True, save the figure to disk
+        plot: if True, the ROC curve will be displayed (with pyplot) when save is False, and saved to out_path otherwise
+        save: if True, save the figure to disk; the figure is then not registered in pyplot, so it is released after saving
     Returns:
         fpr: false positive rates
         tpr: true positive rates
@@ -44,7 +115,12 @@ def plot_roc_curve(flat_y_test: list,
         tpr[-1] = 1.0  # ensure that last element is 1
         auc_roc = auc(fpr, tpr)
         if plot:
-            fig, ax = plt.subplots()
+            if save:
+                fig = new_figure()
+                ax = fig.subplots()
+            else:  # interactive use: the figure is displayed by pyplot (e.g. in a notebook or with plt.show())
+                import matplotlib.pyplot as plt
+                fig, ax = plt.subplots()
             ax.plot(fpr, tpr, color="b", label=f'{legend_label} (AUC = {auc_roc:.2f})', lw=2, alpha=.8)
             ax.set(xlim=[-0.05, 1.05], ylim=[-0.05, 1.05])
             ax.set_title(f"ROC curve; {cv_folds}-fold CV", weight="bold", fontsize=15)
@@ -52,7 +128,7 @@ def plot_roc_curve(flat_y_test: list,
             ax.set_ylabel('TPR (sensitivity)', fontsize=12)
             ax.legend(loc="lower right")
             if save:
-                fig.savefig(out_path)  # save the full figure
+                save_and_release_figure(fig, out_path)  # save the full figure
 
         return fpr, tpr, auc_roc
 
@@ -63,8 +139,7 @@ def plot_roc_curve(flat_y_test: list,
         y_pred_probab_np = np.asanyarray(flat_y_pred_proba)  # type: np.ndarray
 
         # transform the labels into 1-hot encoding format
-        y_test_one_hot = torch.nn.functional.one_hot(torch.as_tensor(flat_y_test),
-                                                     num_classes=nb_classes).detach().cpu().numpy()  # type: np.ndarray
+        y_test_one_hot = one_hot_encode(flat_y_test, nb_classes)  # type: np.ndarray
 
         # store the fpr, tpr, and roc_auc for all averaging strategies
         fpr, tpr, auc_roc = dict(), dict(), dict()
@@ -80,28 +155,37 @@ def plot_roc_curve(flat_y_test: list,
 def save_loss_curves(train_loss: list,
                      val_loss: list,
                      image_dir: str,
-                     image_filename: str) -> None:
+                     image_filename: str,
+                     max_points: Optional[int] = None) -> None:
     """ This function plots the training loss curve. If val_loss is not empty, it also plots the validation loss curve
     (overlayed) with a dashed line and highlights the minimum value with a red circle.
     Args:
-        train_loss: training loss
-        val_loss: validation loss
+        train_loss: training loss (list or array)
+        val_loss: validation loss (list or array); None or empty if there is no validation curve
         image_dir: path where we want to save the image
         image_filename: name of image
+        max_points: maximum number of points drawn per curve (see min_max_decimation_indexes); the minimum of val_loss
+            is always computed on the full data. Defaults to two points per pixel column of the figure
     """
     create_dir_if_not_exist(image_dir)  # if output dir does not exist, create it
 
+    train_loss = np.asarray(train_loss, dtype=float)
+    val_loss = np.asarray(val_loss if val_loss is not None else [], dtype=float)  # None would become a 0-d nan array
     x_axis = np.arange(1, len(train_loss) + 1, 1)  # since the input vectors have same length, just use one of them to extract epochs
 
-    fig, ax1 = plt.subplots()  # create figure
+    fig = new_figure()  # create figure
+    ax1 = fig.subplots()
+    if max_points is None:
+        max_points = _default_max_points(fig)
     color_1 = 'tab:red'
-    ax1.plot(x_axis, train_loss, color=color_1, label='Train loss')
+    _plot_decimated(ax1, x_axis, train_loss, max_points, color=color_1, label='Train loss')
 
-    if val_loss:  # if val_loss is not empty
+    if val_loss.size > 0:  # if val_loss is not empty
         assert len(train_loss) == len(val_loss), "We expect to have the same length for train_loss and val_loss"
-        ax1.plot(x_axis, val_loss, "--", color=color_1, label='Val loss')
-        idx_min = first_argmin(val_loss)  # find index of minimum value
-        ax1.plot(x_axis[idx_min], min(val_loss), 'ro', markersize="10", label='min val_loss = {:.4f}'.format(min(val_loss)))  # highlight maximum value in the plot
+        _plot_decimated(ax1, x_axis, val_loss, max_points, "--", color=color_1, label='Val loss')
+        idx_min = int(np.argmin(val_loss))  # find index of (first) minimum value, on the full data
+        min_val_loss = val_loss[idx_min]
+        ax1.plot(x_axis[idx_min], min_val_loss, 'ro', markersize="10", label='min val_loss = {:.4f}'.format(min_val_loss))  # highlight minimum value in the plot
 
     ax1.tick_params(axis='y', labelcolor=color_1)
     ax1.set_xlabel('Epochs')
@@ -112,35 +196,44 @@ def save_loss_curves(train_loss: list,
     fig.suptitle('Loss Curves', fontsize=16, fontweight='bold')
     fig.legend(loc="upper right")
     image_path = os.path.join(image_dir, image_filename)
-    fig.savefig(image_path)  # save the full figure
+    save_and_release_figure(fig, image_path)  # save the full figure
 
 
 def save_validation_metrics(val_accuracy: list,
                             val_weighted_f1: list,
                             image_dir: str,
-                            image_filename: str) -> None:
+                            image_filename: str,
+                            max_points: Optional[int] = None) -> None:
     """This function plots the train/val metrics
     Args:
-        val_accuracy: validation accuracy
-        val_weighted_f1: validation weighted f1 score
+        val_accuracy: validation accuracy (list or array)
+        val_weighted_f1: validation weighted f1 score (list or array)
         image_dir: path where we want to save the image
         image_filename: image filename
+        max_points: maximum number of points drawn per curve (see min_max_decimation_indexes); the maximum of
+            val_weighted_f1 is always computed on the full data. Defaults to two points per pixel column of the figure
     """
     create_dir_if_not_exist(image_dir)  # if output dir does not exist, create it
     assert len(val_accuracy) == len(val_weighted_f1), "We expect to have the same length for val_accuracy and val_weighted_f1"
 
+    val_accuracy = np.asarray(val_accuracy, dtype=float)
+    val_weighted_f1 = np.asarray(val_weighted_f1, dtype=float)
     x_axis = np.arange(1, len(val_accuracy) + 1, 1)  # since the two input vectors have same length, just use one of the two to extract epochs
-    fig2, ax1 = plt.subplots()  # create figure
+    fig2 = new_figure()  # create figure
+    ax1 = fig2.subplots()
+    if max_points is None:
+        max_points = _default_max_points(fig2)
     color_1 = 'tab:green'
     color_2 = 'tab:blue'
-    ax1.plot(x_axis, val_accuracy, "--", color=color_1, label='Val accuracy')
-    ax1.plot(x_axis, val_weighted_f1, "--", color=color_2, label='Val weighted f1-score')
-    idx_max = first_argmax(val_weighted_f1)  # find index of maximum value
-    ax1.plot(x_axis[idx_max], max(val_weighted_f1), 'ro', markersize="10", label='max val_f1 = {:.4f}'.format(max(val_weighted_f1)))  # highlight maximum value in the plot
+    _plot_decimated(ax1, x_axis, val_accuracy, max_points, "--", color=color_1, label='Val accuracy')
+    _plot_decimated(ax1, x_axis, val_weighted_f1, max_points, "--", color=color_2, label='Val weighted f1-score')
+    idx_max = int(np.argmax(val_weighted_f1))  # find index of (first) maximum value, on the full data
+    max_val_f1 = val_weighted_f1[idx_max]
+    ax1.plot(x_axis[idx_max], max_val_f1, 'ro', markersize="10", label='max val_f1 = {:.4f}'.format(max_val_f1))  # highlight maximum value in the plot
     ax1.set_xlabel('Epochs')
     ax1.set_ylabel('Validation metrics')
     ax1.xaxis.set_major_locator(MaxNLocator(integer=True))  # only keep integers in x axis
 
     fig2.suptitle('Val Curves', fontsize=16, fontweight='bold'), fig2.legend(loc="upper right")
     image_path = os.path.join(image_dir, image_filename)
-    fig2.savefig(image_path)  # save the full figure
+    save_and_release_figure(fig2, image_path)  # save the full figure
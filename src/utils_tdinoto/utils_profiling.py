@@ -0,0 +1,269 @@
+import os
+import sys
+import json
+import math
+import time
+import functools
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+_HAS_RESET_PEAK = hasattr(tracemalloc, "reset_peak")  # python >= 3.9; without it, per-span peaks cannot be measured
+
+
+def _peak_rss_mb() -> float:
+    """This function returns the peak resident set size of the process in MB (NaN if it cannot be measured)"""
+    if resource is None:
+        return float("nan")
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return max_rss / 2 ** 20 if sys.platform == "darwin" else max_rss / 2 ** 10  # bytes on macOS, KB on Linux
+
+
+class Profiler:
+    """This class records nested timing spans (wall time, CPU time and, optionally, peak memory) from any thread,
+    aggregates them per span name, and exports them as a text table, as JSON or in the Chrome trace format
+    (which can be opened in chrome://tracing or https://ui.perfetto.dev).
+    Example:
+        >>> profiler = Profiler()
+        >>> with profiler.span("preprocessing"):
+        ...     with profiler.span("resampling"):
+        ...         pass
+        >>> print(profiler.to_table())
+    """
+
+    def __init__(self,
+                 enabled: bool = True,
+                 track_memory: bool = False,
+                 max_events: int = 10 ** 6):
+        """
+        Args:
+            enabled: if False, spans and decorated functions run without any measurement
+            track_memory: if True, also record the peak traced Python memory (tracemalloc) and the peak RSS of each span;
+                note that tracemalloc slows down allocations and that its peak is process-wide (i.e. shared by threads);
+                the peak traced memory is not reported before python 3.9 (no tracemalloc.reset_peak)
+            max_events: maximum number of individual spans kept for the Chrome trace (statistics are always updated)
+        """
+        self.enabled = enabled
+        self.track_memory = track_memory
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin_ns = time.perf_counter_ns()
+        self._stats = {}  # type: dict # span name -> aggregated statistics
+        self._events = []  # type: list
+        self.nb_dropped_events = 0
+        self._started_tracemalloc = False  # whether tracemalloc was started by this profiler (and must be stopped by it)
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self,
+             name: str) -> Iterator[None]:
+        """This method is a context manager that measures the enclosed block as a span called name.
+        Spans opened inside another span (in the same thread) are recorded as its children.
+        Args:
+            name: name of the span; statistics are aggregated per name
+        """
+        if not self.enabled:
+            yield
+            return
+        stack = self._stack()
+        frame = {"name": name, "prior_peak": 0}  # prior_peak: memory peak reached before the last child span started
+        track_memory = self.track_memory
+        if track_memory:
+            with self._lock:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self._started_tracemalloc = True
+            start_mem, peak_mem = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1]["prior_peak"] = max(stack[-1]["prior_peak"], peak_mem)
+            if _HAS_RESET_PEAK:
+                tracemalloc.reset_peak()
+        stack.append(frame)
+        start_cpu = time.thread_time_ns()
+        start_wall = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            wall_ns = time.perf_counter_ns() - start_wall
+            cpu_ns = time.thread_time_ns() - start_cpu
+            peak_mem_mb, peak_rss_mb = float("nan"), float("nan")
+            if track_memory:
+                _, peak_mem = tracemalloc.get_traced_memory()  # peak since this span (or its last child) started
+                if _HAS_RESET_PEAK:  # otherwise, it would be the process-wide peak since tracing started
+                    peak_mem_mb = max(max(peak_mem, frame["prior_peak"]) - start_mem, 0) / 2 ** 20
+                peak_rss_mb = _peak_rss_mb()
+            path = "/".join(stack_frame["name"] for stack_frame in stack)
+            stack.pop()
+            if track_memory and stack:  # the parent span must still see the peak reached inside this span
+                stack[-1]["prior_peak"] = max(stack[-1]["prior_peak"], peak_mem, frame["prior_peak"])
+            self._record(name, path, start_wall, wall_ns, cpu_ns, peak_mem_mb, peak_rss_mb)
+
+    def stop_memory_tracking(self) -> None:
+        """This method stops tracemalloc if this profiler started it, since tracing slows down every allocation of the
+        process; it is started again by the next span if track_memory is still True"""
+        with self._lock:
+            if self._started_tracemalloc:
+                if tracemalloc.is_tracing():
+                    tracemalloc.stop()
+                self._started_tracemalloc = False
+
+    def _record(self,
+                name: str,
+                path: str,
+                start_wall_ns: int,
+                wall_ns: int,
+                cpu_ns: int,
+                peak_mem_mb: float,
+                peak_rss_mb: float) -> None:
+        wall_s, cpu_s = wall_ns / 1e9, cpu_ns / 1e9
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = {"count": 0, "wall_total_s": 0.0, "wall_min_s": float("inf"),
+                                             "wall_max_s": 0.0, "cpu_total_s": 0.0,
+                                             "peak_mem_mb": float("nan"), "peak_rss_mb": float("nan")}
+            stats["count"] += 1
+            stats["wall_total_s"] += wall_s
+            stats["wall_min_s"] = min(stats["wall_min_s"], wall_s)
+            stats["wall_max_s"] = max(stats["wall_max_s"], wall_s)
+            stats["cpu_total_s"] += cpu_s
+            if not math.isnan(peak_mem_mb):
+                stats["peak_mem_mb"] = peak_mem_mb if math.isnan(stats["peak_mem_mb"]) else max(stats["peak_mem_mb"], peak_mem_mb)
+                stats["peak_rss_mb"] = peak_rss_mb
+            if len(self._events) < self.max_events:
+                self._events.append({"name": name,
+                                     "ph": "X",  # complete event
+                                     "ts": (start_wall_ns - self._origin_ns) / 1e3,  # microseconds
+                                     "dur": wall_ns / 1e3,
+                                     "pid": os.getpid(),
+                                     "tid": threading.get_ident(),
+                                     "args": {"path": path, "cpu_ms": cpu_ns / 1e6}})
+            else:
+                self.nb_dropped_events += 1
+
+    def profile(self,
+                name: Optional[str] = None) -> Callable:
+        """This method returns a decorator that records each call of the decorated function as a span
+        Args:
+            name: name of the span; defaults to the qualified name of the function
+        Returns:
+            decorator
+        """
+        def decorator(func: Callable) -> Callable:
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:  # near-zero overhead when profiling is disabled
+                    return func(*args, **kwargs)
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def reset(self) -> None:
+        """This method discards all the recorded spans"""
+        with self._lock:
+            self._stats.clear()
+            self._events.clear()
+            self.nb_dropped_events = 0
+
+    def stats(self) -> dict:
+        """This method returns the aggregated statistics
+        Returns:
+            stats: dict that maps each span name to its statistics (count, total/min/max/mean wall time, CPU time, peak memory)
+        """
+        with self._lock:
+            stats = {name: dict(values, wall_mean_s=values["wall_total_s"] / values["count"])
+                     for name, values in self._stats.items()}
+
+        return stats
+
+    def to_table(self) -> str:
+        """This method formats the aggregated statistics as a text table, sorted by total wall time
+        Returns:
+            table: formatted table
+        """
+        stats = self.stats()
+        name_width = max([len("name")] + [len(name) for name in stats])
+        lines = [f"{'name':<{name_width}} {'count':>8} {'total[s]':>10} {'mean[s]':>10} {'min[s]':>10} {'max[s]':>10} "
+                 f"{'cpu[s]':>10} {'peak_mem[MB]':>13} {'peak_rss[MB]':>13}"]
+        for name, values in sorted(stats.items(), key=lambda item: item[1]["wall_total_s"], reverse=True):
+            lines.append(f"{name:<{name_width}} {values['count']:>8d} {values['wall_total_s']:>10.4f} {values['wall_mean_s']:>10.4f} "
+                         f"{values['wall_min_s']:>10.4f} {values['wall_max_s']:>10.4f} {values['cpu_total_s']:>10.4f} "
+                         f"{values['peak_mem_mb']:>13.1f} {values['peak_rss_mb']:>13.1f}")
+        table = "\n".join(lines)
+
+        return table
+
+    def to_json(self,
+                out_path: str) -> None:
+        """This method saves the aggregated statistics to a json file
+        Args:
+            out_path: path of the output json file
+        """
+        stats = {name: {key: (None if isinstance(value, float) and math.isnan(value) else value) for key, value in values.items()}  # NaN is not valid json
+                 for name, values in self.stats().items()}
+        with open(out_path, "w") as out_file:
+            json.dump(stats, out_file, indent=2)
+
+    def to_chrome_trace(self,
+                        out_path: str) -> None:
+        """This method saves the individual spans in the Chrome trace event format
+        Args:
+            out_path: path of the output json file
+        """
+        with self._lock:
+            events = list(self._events)
+        with open(out_path, "w") as out_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, out_file)
+
+
+# package-wide profiler used to (optionally) instrument the heavy functions of utils_tdinoto; disabled by default
+PROFILER = Profiler(enabled=False)
+
+
+def enable_profiling(track_memory: bool = False) -> Profiler:
+    """This function enables the package-wide profiler, which records the instrumented functions of utils_tdinoto
+    (e.g. resample_volume, dcm2nii_sitk, bias_field_correction_sitk and the BIDS scanners)
+    Args:
+        track_memory: if True, also record peak memory (see Profiler)
+    Returns:
+        PROFILER: the package-wide profiler
+    """
+    PROFILER.track_memory = track_memory
+    PROFILER.enabled = True
+    if not track_memory:
+        PROFILER.stop_memory_tracking()
+
+    return PROFILER
+
+
+def disable_profiling() -> None:
+    """This function disables the package-wide profiler and stops the memory tracing it started; the recorded spans are kept"""
+    PROFILER.enabled = False
+    PROFILER.stop_memory_tracking()
+
+
+def span(name: str):
+    """This function is a shortcut for PROFILER.span(name)"""
+    return PROFILER.span(name)
+
+
+def profiled(name: Optional[str] = None) -> Callable:
+    """This function is a shortcut for PROFILER.profile(name)"""
+    return PROFILER.profile(name)
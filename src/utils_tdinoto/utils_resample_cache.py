@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import errno
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Sequence, Tuple
+import numpy as np
+import nibabel as nib
+import SimpleITK as sitk
+from utils_tdinoto.utils_io import create_dir_if_not_exist
+from utils_tdinoto.utils_nifti_dicom import resample_image_sitk
+
+
+def hash_file_content(file_path: str,
+                      chunk_size: int = 1 << 20) -> str:
+    """This function computes the sha256 digest of a file, reading it in chunks
+    Args:
+        file_path: path to the file
+        chunk_size: number of bytes read at a time
+    Returns:
+        digest: hex digest of the file content
+    """
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as in_file:
+        for chunk in iter(lambda: in_file.read(chunk_size), b""):
+            sha256.update(chunk)
+
+    return sha256.hexdigest()
+
+
+class ResampleCache:
+    """This class is a persistent on-disk cache of resampled volumes, shared by experiments and concurrent jobs.
+    Entries are keyed by (input volume, new spacing, interpolator) and stored as uncompressed .nii files, so they can be
+    memory-mapped instead of decompressed at each use. When the cache exceeds its disk budget, the least recently used
+    entries are deleted. Each entry is computed under an exclusive lock file (O_CREAT | O_EXCL), so concurrent jobs
+    requesting the same entry compute it only once.
+    Example:
+        >>> cache = ResampleCache("/path/to/resample_cache", max_bytes=100 * 2 ** 30)
+        >>> _, volume_nii_obj, volume_nii = cache.resample_volume("/path/to/sub-001_angio.nii.gz", [0.5, 0.5, 0.5])
+    """
+
+    def __init__(self,
+                 cache_dir: str,
+                 max_bytes: int = 50 * 2 ** 30,
+                 hash_content: bool = False,
+                 lock_timeout_s: float = 3600.0,
+                 stale_lock_s: float = 3600.0):
+        """
+        Args:
+            cache_dir: directory of the cache (it can be shared by several processes and machines)
+            max_bytes: disk budget of the cache in bytes
+            hash_content: if True, the input volume is identified by the sha256 of its content (robust to copies and
+                moves, but the whole file is read); if False, by its absolute path, modification time and size
+            lock_timeout_s: maximum time to wait for an entry that another job is computing
+            stale_lock_s: lock files older than this are considered left over by a crashed job and removed
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hash_content = hash_content
+        self.lock_timeout_s = lock_timeout_s
+        self.stale_lock_s = stale_lock_s
+        create_dir_if_not_exist(cache_dir)
+
+    def key(self,
+            volume_path: str,
+            new_spacing: Sequence[float],
+            interpolator: int = sitk.sitkLinear) -> str:
+        """This method returns the cache key of a resampling
+        Args:
+            volume_path: input volume path
+            new_spacing: desired voxel spacing
+            interpolator: sitk interpolator
+        Returns:
+            key: hex digest identifying the resampled volume
+        """
+        if self.hash_content:
+            volume_id = ["content", hash_file_content(volume_path)]
+        else:
+            volume_stat = os.stat(volume_path)
+            volume_id = ["stat", os.path.abspath(volume_path), volume_stat.st_mtime_ns, volume_stat.st_size]
+        spacing = [round(float(spacing_value), 6) for spacing_value in new_spacing]  # 0.5 and np.float32(0.5) give the same key
+        key = hashlib.sha256(json.dumps([volume_id, spacing, int(interpolator)]).encode("utf-8")).hexdigest()
+
+        return key
+
+    def entry_path(self,
+                   key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.nii")
+
+    @contextmanager
+    def _lock(self,
+              key: str) -> Iterator[None]:
+        lock_path = os.path.join(self.cache_dir, f"{key}.lock")
+        deadline = time.monotonic() + self.lock_timeout_s
+        while True:
+            try:
+                lock_fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)  # atomic: only one job succeeds
+                break
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+                try:
+                    lock_stat = os.stat(lock_path)
+                except FileNotFoundError:  # released in the meantime
+                    continue
+                if time.time() - lock_stat.st_mtime > self.stale_lock_s:  # left over by a crashed job
+                    self._remove_stale_lock(lock_path, lock_stat)
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Timed out waiting for the lock {lock_path}")
+                time.sleep(0.1)
+        try:
+            os.write(lock_fd, str(os.getpid()).encode("utf-8"))
+            os.close(lock_fd)
+            yield
+        finally:
+            try:
+                os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _remove_stale_lock(lock_path: str,
+                           lock_stat: os.stat_result) -> None:
+        """This method removes a stale lock without check-then-remove race: several waiters can find the same lock stale,
+        and a plain os.remove could delete the fresh lock that one of them acquired in the meantime. The lock is instead
+        atomically renamed to a unique name, so that each lock file is taken by one waiter only; if the renamed file is
+        not the one that was found stale (different inode or mtime), it is put back"""
+        stale_path = f"{lock_path}.{os.getpid()}.{threading.get_ident()}.stale"
+        try:
+            os.rename(lock_path, stale_path)
+        except FileNotFoundError:  # removed by another waiter
+            return
+        renamed_stat = os.stat(stale_path)
+        if (renamed_stat.st_ino, renamed_stat.st_mtime_ns) != (lock_stat.st_ino, lock_stat.st_mtime_ns):
+            try:
+                os.link(stale_path, lock_path)  # put the fresh lock back, without overwriting a lock created in the meantime
+            except FileExistsError:
+                pass
+        os.remove(stale_path)
+
+    def get_or_compute(self,
+                       volume_path: str,
+                       new_spacing: Sequence[float],
+                       interpolator: int = sitk.sitkLinear) -> str:
+        """This method returns the path of the cached resampled volume, computing it if needed
+        Args:
+            volume_path: input volume path
+            new_spacing: desired voxel spacing
+            interpolator: sitk interpolator
+        Returns:
+            path_entry: path of the uncompressed resampled volume (.nii) in the cache
+        """
+        key = self.key(volume_path, new_spacing, interpolator)
+        path_entry = self.entry_path(key)
+        if not os.path.exists(path_entry):
+            with self._lock(key):
+                if not os.path.exists(path_entry):  # another job may have computed it while we were waiting
+                    resampled_volume = resample_image_sitk(sitk.ReadImage(volume_path), new_spacing, interpolator)
+                    tmp_path = os.path.join(self.cache_dir, f"{key}.{os.getpid()}.tmp.nii")
+                    sitk.WriteImage(resampled_volume, tmp_path)
+                    os.replace(tmp_path, path_entry)  # atomic rename: readers never see a partial entry
+                    self.evict(keep=(path_entry,))
+        try:
+            os.utime(path_entry)  # last use, for the LRU eviction (atime is often disabled, so mtime is used)
+        except FileNotFoundError:  # evicted by another job in the meantime
+            return self.get_or_compute(volume_path, new_spacing, interpolator)
+
+        return path_entry
+
+    def resample_volume(self,
+                        volume_path: str,
+                        new_spacing: Sequence[float],
+                        interpolator: int = sitk.sitkLinear) -> Tuple[sitk.Image, nib.Nifti1Image, np.ndarray]:
+        """This method is the cached counterpart of resample_volume (same outputs); the numpy array is memory-mapped
+        from the cache entry when possible
+        Args:
+            volume_path: input volume path
+            new_spacing: desired voxel spacing
+            interpolator: sitk interpolator
+        Returns:
+            resampled_volume_sitk_obj: resampled volume as sitk object
+            resampled_volume_nii_obj: resampled volume as nib object
+            resampled_volume_nii: resampled volume as numpy array
+        """
+        path_entry = self.get_or_compute(volume_path, new_spacing, interpolator)
+        resampled_volume_sitk_obj = sitk.ReadImage(path_entry)
+        resampled_volume_nii_obj = nib.load(path_entry, mmap=True)  # type: nib.Nifti1Image
+        resampled_volume_nii = np.asanyarray(resampled_volume_nii_obj.dataobj)  # type: np.ndarray
+
+        return resampled_volume_sitk_obj, resampled_volume_nii_obj, resampled_volume_nii
+
+    def size_bytes(self) -> int:
+        """This method returns the total size of the cache entries in bytes"""
+        return sum(entry.stat().st_size for entry in os.scandir(self.cache_dir) if entry.name.endswith(".nii") and ".tmp" not in entry.name)
+
+    def evict(self,
+              keep: Sequence[str] = ()) -> int:
+        """This method deletes the least recently used entries until the cache fits in its disk budget
+        Args:
+            keep: paths of entries that must not be deleted
+        Returns:
+            nb_evicted: number of deleted entries
+        """
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".nii") and ".tmp" not in entry.name:
+                try:
+                    entry_stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((entry_stat.st_mtime, entry_stat.st_size, entry.path))
+        total_bytes = sum(size for _, size, _ in entries)
+        nb_evicted = 0
+        for _, size, path in sorted(entries):  # least recently used first
+            if total_bytes <= self.max_bytes:
+                break
+            if path in keep:
+                continue
+            try:
+                os.remove(path)  # readers that already opened (or mmapped) the entry keep their data on POSIX
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+            nb_evicted += 1
+
+        return nb_evicted
+
+    def clear(self) -> None:
+        """This method deletes all the cache entries; the temporary files of entries being computed are kept"""
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".nii") and ".tmp" not in entry.name:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:  # evicted by another job in the meantime
+                    pass
@@ -0,0 +1,187 @@
+import heapq
+import math
+from operator import itemgetter
+from typing import Callable, Iterable, Optional
+import numpy as np
+
+
+def argmax_first(values: Iterable,
+                 key: Optional[Callable] = None) -> int:
+    """This function returns the index of the max value. If there are duplicate max values, the index of the first
+    maximum value found is returned. Numpy arrays are handled with np.argmax, and generators are consumed in a single pass.
+    Args:
+        values: iterable (list, tuple, generator, numpy array) for which we want to find the argmax
+        key: optional function applied to each value before comparing
+    Returns:
+        idx_max: index corresponding to the maximum value
+    Raises:
+        ValueError: if values is empty
+    """
+    if isinstance(values, np.ndarray) and key is None:
+        if values.size == 0:
+            raise ValueError("argmax_first() arg is an empty sequence")
+        return int(np.argmax(values))
+    if key is None:
+        if isinstance(values, (list, tuple)):
+            # max() and index() both run in C, which is faster than a single pass with a Python-level key
+            return values.index(max(values))
+        return max(enumerate(values), key=itemgetter(1))[0]  # max() keeps the first of equal items
+    return max(enumerate(values), key=lambda idx_value: key(idx_value[1]))[0]
+
+
+def argmin_first(values: Iterable,
+                 key: Optional[Callable] = None) -> int:
+    """This function returns the index of the min value. If there are duplicate min values, the index of the first
+    minimum value found is returned. Numpy arrays are handled with np.argmin, and generators are consumed in a single pass.
+    Args:
+        values: iterable (list, tuple, generator, numpy array) for which we want to find the argmin
+        key: optional function applied to each value before comparing
+    Returns:
+        idx_min: index corresponding to the minimum value
+    Raises:
+        ValueError: if values is empty
+    """
+    if isinstance(values, np.ndarray) and key is None:
+        if values.size == 0:
+            raise ValueError("argmin_first() arg is an empty sequence")
+        return int(np.argmin(values))
+    if key is None:
+        if isinstance(values, (list, tuple)):
+            # min() and index() both run in C, which is faster than a single pass with a Python-level key
+            return values.index(min(values))
+        return min(enumerate(values), key=itemgetter(1))[0]  # min() keeps the first of equal items
+    return min(enumerate(values), key=lambda idx_value: key(idx_value[1]))[0]
+
+
+def top_k(values: Iterable,
+          k: int,
+          key: Optional[Callable] = None,
+          largest: bool = True) -> list:
+    """This function returns the k largest (or smallest) values with a heap, i.e. in O(n log k) time and O(k) memory.
+    Ties are resolved in favour of the value that comes first.
+    Args:
+        values: input iterable (can be a generator)
+        k: number of values to retrieve
+        key: optional function applied to each value before comparing
+        largest: if True (default), retrieve the k largest values; otherwise, the k smallest
+    Returns:
+        out_list: list of (index, value) tuples, sorted from best to worst
+    Example:
+        >>> top_k([3, 1, 4, 1, 5], k=2)
+        [(4, 5), (2, 4)]
+    """
+    select = heapq.nlargest if largest else heapq.nsmallest
+    if key is None:
+        out_list = select(k, enumerate(values), key=itemgetter(1))
+    else:
+        out_list = select(k, enumerate(values), key=lambda idx_value: key(idx_value[1]))
+
+    return out_list
+
+
+def top_k_dict_items(d: dict,
+                     k: int,
+                     largest: bool = True) -> list:
+    """This function returns the k items of d with the largest (or smallest) values, e.g. the k most frequent labels of a count dict.
+    Args:
+        d: input dict (e.g. a Counter)
+        k: number of items to retrieve
+        largest: if True (default), retrieve the items with the largest values; otherwise, the smallest
+    Returns:
+        out_list: list of (key, value) tuples, sorted from best to worst
+    """
+    select = heapq.nlargest if largest else heapq.nsmallest
+    out_list = select(k, d.items(), key=itemgetter(1))
+
+    return out_list
+
+
+def top_k_indexes_array(input_array: np.ndarray,
+                        k: int,
+                        largest: bool = True) -> np.ndarray:
+    """This function returns the indexes of the k largest (or smallest) values of a 1D array with np.argpartition,
+    which runs in linear time instead of sorting the whole array. The returned indexes are sorted from best to worst.
+    Args:
+        input_array: 1D input array
+        k: number of indexes to retrieve
+        largest: if True (default), retrieve the indexes of the k largest values; otherwise, of the k smallest
+    Returns:
+        idxs: indexes of the top-k values
+    """
+    input_array = np.asarray(input_array).ravel()
+    k = min(k, input_array.size)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    size = input_array.size
+    # no negation of the values to select the largest ones: it wraps around for unsigned ints, overflows for the
+    # minimum signed int and is not defined for bools
+    if k == size:
+        idxs = np.arange(size)
+    elif largest:
+        idxs = np.sort(np.argpartition(input_array, size - k)[-k:])  # sorted, so that ties are ordered by index
+    else:
+        idxs = np.sort(np.argpartition(input_array, k - 1)[:k])
+    if largest:  # stable descending sort of the k selected values: ascending on the reversed indexes, then reversed
+        idxs = idxs[::-1][np.argsort(input_array[idxs[::-1]], kind="stable")][::-1]
+    else:
+        idxs = idxs[np.argsort(input_array[idxs], kind="stable")]  # only sort the k selected values
+
+    return idxs
+
+
+class RunningBest:
+    """This class incrementally tracks the best value of a metric (e.g. the validation loss across epochs),
+    so that training loops do not need to keep the whole history in memory to find the best epoch.
+    Example:
+        >>> tracker = RunningBest(mode="min")
+        >>> for epoch, val_loss in enumerate([0.9, 0.7, 0.8]):
+        ...     improved = tracker.update(val_loss)
+        >>> tracker.best_value, tracker.best_index
+        (0.7, 1)
+    """
+
+    def __init__(self,
+                 mode: str = "min",
+                 min_delta: float = 0.0):
+        """
+        Args:
+            mode: "min" if lower values are better (e.g. loss), "max" if higher values are better (e.g. f1-score)
+            min_delta: minimum change with respect to the current best value to count as an improvement
+        Raises:
+            ValueError: if mode is neither "min" nor "max"
+        """
+        if mode not in ("min", "max"):
+            raise ValueError(f"mode can only be 'min' or 'max'. Got {mode} instead")
+        self.mode = mode
+        self.min_delta = min_delta
+        self.best_value = math.inf if mode == "min" else -math.inf
+        self.best_index = -1  # index of the best value; -1 until the first update
+        self.nb_updates = 0
+
+    def update(self,
+               value: float) -> bool:
+        """This method feeds a new value to the tracker
+        Args:
+            value: new value of the metric
+        Returns:
+            improved: True if value is the new best value (the first occurrence is kept in case of ties); False otherwise
+        """
+        idx = self.nb_updates
+        self.nb_updates += 1
+        if self.mode == "min":
+            improved = value < self.best_value - self.min_delta
+        else:
+            improved = value > self.best_value + self.min_delta
+        if improved:
+            self.best_value = value
+            self.best_index = idx
+
+        return improved
+
+    @property
+    def nb_updates_since_best(self) -> int:
+        """Number of updates since the last improvement (useful for early stopping)"""
+        return self.nb_updates - 1 - self.best_index
+
+    def __repr__(self):
+        return f"RunningBest(mode={self.mode!r}, best_value={self.best_value}, best_index={self.best_index})"
@@ -0,0 +1,219 @@
+import sys
+import atexit
+import functools
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+import numpy as np
+try:
+    from multiprocessing import shared_memory, resource_tracker  # python >= 3.8
+except ImportError:
+    shared_memory = None
+    resource_tracker = None
+
+SHARED_ARRAY_ALIGNMENT = 64  # bytes; each array of a segment starts on a cache line
+_ATTACHED_SEGMENTS = {}  # type: Dict[str, "shared_memory.SharedMemory"]
+_ATTACHED_SEGMENTS_LOCK = threading.Lock()
+_RESOURCE_TRACKER_LOCK = threading.Lock()  # held while resource_tracker.register is swapped (see _open_untracked_segment)
+_WORKER_ARRAYS = {}  # type: Dict[str, np.ndarray]
+
+
+class SharedArrayDescriptor(NamedTuple):
+    """Lightweight, picklable handle of an array stored in a shared memory segment (see attach_shared_array)"""
+    name: str  # name of the shared memory segment
+    shape: Tuple[int, ...]
+    dtype: str  # numpy dtype string, e.g. "<f4"
+    offset: int  # position of the first byte of the array in the segment
+
+
+def _check_shared_memory_available() -> None:
+    if shared_memory is None:
+        raise RuntimeError("multiprocessing.shared_memory is not available (it requires python >= 3.8)")
+
+
+class SharedArrays:
+    """This class owns one shared memory segment holding one or more numpy arrays. Worker processes access the arrays
+    without copying them through their descriptors (see attach_shared_array), which are only a few bytes to pickle.
+    The segment is released (closed and unlinked) by close(), at the end of a with block, at interpreter exit, or, if
+    the owner process crashes, by the multiprocessing resource tracker (which then warns about a leaked segment).
+    Example:
+        >>> with SharedArrays.publish({"volume": volume}) as shared:
+        ...     descriptor = shared.descriptors["volume"]  # send this to the workers
+        ...     shared.arrays["volume"]  # view of the shared copy in this process
+    """
+
+    def __init__(self,
+                 specs: Dict[str, Tuple[Sequence[int], Union[str, np.dtype, type]]]):
+        """
+        Args:
+            specs: name -> (shape, dtype) of each array to allocate; the arrays are not initialized
+        Raises:
+            RuntimeError: if multiprocessing.shared_memory is not available
+        """
+        _check_shared_memory_available()
+        layout = {}
+        nb_bytes = 0
+        for array_name, (shape, dtype) in specs.items():
+            dtype = np.dtype(dtype)
+            shape = tuple(int(size) for size in np.atleast_1d(shape))
+            offset = -(-nb_bytes // SHARED_ARRAY_ALIGNMENT) * SHARED_ARRAY_ALIGNMENT  # round up to the alignment
+            layout[array_name] = (shape, dtype, offset)
+            nb_bytes = offset + int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        with _RESOURCE_TRACKER_LOCK:  # so that the segment is registered for the crash cleanup (see _open_untracked_segment)
+            self._shm = shared_memory.SharedMemory(create=True, size=max(nb_bytes, 1))  # a segment cannot be empty
+        self.descriptors = {array_name: SharedArrayDescriptor(self._shm.name, shape, dtype.str, offset)
+                            for array_name, (shape, dtype, offset) in layout.items()}  # type: Dict[str, SharedArrayDescriptor]
+        self.arrays = {array_name: np.ndarray(shape, dtype, buffer=self._shm.buf, offset=offset)
+                       for array_name, (shape, dtype, offset) in layout.items()}  # type: Dict[str, np.ndarray]
+        atexit.register(self.close)
+
+    @classmethod
+    def publish(cls,
+                arrays: Dict[str, np.ndarray]) -> "SharedArrays":
+        """This method copies arrays into a new shared memory segment
+        Args:
+            arrays: name -> array to share
+        Returns:
+            shared: owner of the segment
+        """
+        arrays = {array_name: np.asanyarray(array) for array_name, array in arrays.items()}
+        shared = cls({array_name: (array.shape, array.dtype) for array_name, array in arrays.items()})
+        for array_name, array in arrays.items():
+            np.copyto(shared.arrays[array_name], array)
+
+        return shared
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def nbytes(self) -> int:
+        return self._shm.size
+
+    def close(self) -> None:
+        """This method releases the segment; the arrays of this object must not be used afterwards. It is idempotent"""
+        if self._shm is None:
+            return
+        self.arrays = {}  # drop our views, otherwise the buffer cannot be closed
+        try:
+            self._shm.close()
+        except BufferError:  # views still referenced by the caller: the mapping is released when they are garbage collected
+            pass
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:  # already unlinked (e.g. by the resource tracker)
+            pass
+        self._shm = None
+        atexit.unregister(self.close)
+
+    def __enter__(self) -> "SharedArrays":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def _open_untracked_segment(segment_name: str) -> "shared_memory.SharedMemory":
+    """This function attaches to an existing segment without registering it with the resource tracker: otherwise,
+    before python 3.13, the tracker of the attaching process unlinks the segment (or warns about a leak) when the
+    process exits, although it does not own it. Registering and then unregistering is not an option: forked workers
+    share the tracker of the owner, whose own registration would be removed. The register function is instead swapped
+    under _RESOURCE_TRACKER_LOCK, which SharedArrays also holds to create its segments, so that a segment created by
+    another thread in the meantime is still registered"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=segment_name, track=False)
+    with _RESOURCE_TRACKER_LOCK:
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=segment_name)
+        finally:
+            resource_tracker.register = register
+
+
+def attach_shared_array(descriptor: SharedArrayDescriptor,
+                        writable: bool = True) -> np.ndarray:
+    """This function returns a view of an array published by SharedArrays in another process; each segment is mapped
+    only once per process and stays mapped until detach_shared_arrays is called
+    Args:
+        descriptor: descriptor of the array
+        writable: if False, the returned view is read-only
+    Returns:
+        array: view of the shared array (no copy)
+    """
+    _check_shared_memory_available()
+    with _ATTACHED_SEGMENTS_LOCK:
+        shm = _ATTACHED_SEGMENTS.get(descriptor.name)
+        if shm is None:
+            shm = _open_untracked_segment(descriptor.name)
+            _ATTACHED_SEGMENTS[descriptor.name] = shm
+    array = np.ndarray(descriptor.shape, np.dtype(descriptor.dtype), buffer=shm.buf, offset=descriptor.offset)
+    array.flags.writeable = writable
+
+    return array
+
+
+def detach_shared_arrays() -> None:
+    """This function unmaps the segments attached by attach_shared_array (it does not unlink them, the owner does);
+    the views returned by attach_shared_array must not be used afterwards"""
+    _WORKER_ARRAYS.clear()
+    with _ATTACHED_SEGMENTS_LOCK:
+        for shm in _ATTACHED_SEGMENTS.values():
+            try:
+                shm.close()
+            except BufferError:  # views still referenced: the mapping is released when they are garbage collected
+                pass
+        _ATTACHED_SEGMENTS.clear()
+
+
+def _init_shared_worker(descriptors: Dict[str, SharedArrayDescriptor],
+                        writable: Sequence[str]) -> None:
+    _WORKER_ARRAYS.clear()
+    for array_name, descriptor in descriptors.items():
+        _WORKER_ARRAYS[array_name] = attach_shared_array(descriptor, writable=array_name in writable)
+
+
+def _call_with_shared_arrays(func: Callable,
+                             task):
+    return func(_WORKER_ARRAYS, task)
+
+
+def shared_parallel_map(func: Callable,
+                        tasks: Iterable,
+                        arrays: Union[Dict[str, np.ndarray], SharedArrays],
+                        writable: Sequence[str] = (),
+                        max_workers: Optional[int] = None,
+                        chunksize: int = 1) -> List:
+    """This function calls func(arrays, task) for each task in worker processes, where arrays are shared with the
+    workers instead of being pickled: each worker attaches to them once, and only the tasks (e.g. slice indexes) and
+    the results are pickled. Workers can write their outputs into the arrays listed in writable, e.g. disjoint slices
+    of an output volume.
+    Example:
+        >>> def slab_mean(arrays, z):  # module-level function, so that it can be pickled
+        ...     return arrays["volume"][z:z + 16].mean()
+        >>> means = shared_parallel_map(slab_mean, range(0, volume.shape[0], 16), {"volume": volume})
+    Args:
+        func: picklable function taking (dict of array name -> shared array, task)
+        tasks: arguments passed one by one to func
+        arrays: arrays to share; if a dict, they are copied into a temporary segment and the writable ones are copied
+            back into the given arrays at the end; if a SharedArrays object, it is used as is (no copy at all)
+        writable: names of the arrays that func may modify; the others are read-only in the workers
+        max_workers: number of processes; defaults to the number of CPUs
+        chunksize: number of tasks sent to a worker at a time
+    Returns:
+        results: return values of func, in the same order as tasks
+    """
+    shared = arrays if isinstance(arrays, SharedArrays) else SharedArrays.publish(arrays)
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_shared_worker,
+                                 initargs=(shared.descriptors, tuple(writable))) as executor:
+            results = list(executor.map(functools.partial(_call_with_shared_arrays, func), tasks, chunksize=chunksize))
+        if shared is not arrays:
+            for array_name in writable:
+                np.copyto(arrays[array_name], shared.arrays[array_name])
+    finally:
+        if shared is not arrays:
+            shared.close()
+
+    return results
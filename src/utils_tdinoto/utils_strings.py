@@ -1,6 +1,17 @@
 from dateutil.parser import parse
+from datetime import date, datetime
+from functools import lru_cache
 import json
 import os
+import re
+import numpy as np
+
+_DICOM_DA_RE = re.compile(r"(\d{4})(\d{2})(\d{2})")  # DICOM DA value representation, e.g. 20221026
+_SESSION_LABEL_RE = re.compile(r"ses-(\d{4})(\d{2})(\d{2})")  # pseudo-BIDS session label, e.g. ses-20221026
+_NON_DIGITS_RE = re.compile(r"\D+")
+_STR2BOOL_TRUE = ('yes', 'true', 't', 'y', '1')
+_STR2BOOL_FALSE = ('no', 'false', 'f', 'n', '0')
+_ISO_8601_RE = re.compile(r"\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d{1,6})?)?(?:Z|[+-]\d{2}:\d{2})?)?")
 
 
 def is_date(input_string: str,
@@ -21,6 +32,68 @@ def is_date(input_string: str,
         return False
 
 
+@lru_cache(maxsize=2 ** 16)
+def _is_date_cached(input_string: str,
+                    fuzzy: bool) -> bool:
+    try:
+        return is_date(input_string, fuzzy=fuzzy)
+    except OverflowError:  # raised by dateutil for e.g. very long digit strings
+        return False
+
+
+def _is_valid_yyyymmdd(match: re.Match) -> bool:
+    try:
+        date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        return True
+    except ValueError:
+        return False
+
+
+def _is_date_fast(input_string: str,
+                  fuzzy: bool,
+                  session_labels: bool) -> bool:
+    """This function tries the fixed formats first and only falls back to the (cached) dateutil parser for leftovers"""
+    match = _DICOM_DA_RE.fullmatch(input_string)
+    if match and _is_valid_yyyymmdd(match):
+        return True
+    if session_labels:
+        match = _SESSION_LABEL_RE.fullmatch(input_string)
+        if match and _is_valid_yyyymmdd(match):
+            return True
+    if _ISO_8601_RE.fullmatch(input_string):
+        try:
+            datetime.fromisoformat(input_string.replace("Z", "+00:00"))
+            return True
+        except ValueError:
+            pass
+
+    return _is_date_cached(input_string, fuzzy)
+
+
+def are_dates(input_strings,
+              fuzzy: bool = False,
+              session_labels: bool = True) -> np.ndarray:
+    """This function is the batch version of is_date, meant for whole columns (e.g. of DICOM-derived metadata).
+    Each distinct value is classified only once; fixed formats (DICOM DA "YYYYMMDD", ISO-8601 and, optionally,
+    "ses-YYYYMMDD" session labels) are checked with precompiled regexes, and only the leftovers are passed
+    to dateutil, whose results are memoized across calls with an LRU cache.
+    Args:
+        input_strings: sequence of strings (list, numpy array or pandas Series); non-string values (e.g. NaN, None) are not dates
+        fuzzy: ignore unknown tokens in string if True (only used for the dateutil fallback)
+        session_labels: if True, pseudo-BIDS session labels like "ses-20221026" are also considered dates
+    Returns:
+        dates_mask: boolean array with the same length as input_strings (positionally aligned, also for pandas Series)
+    """
+    values = list(input_strings)
+    result_by_value = {}  # type: dict
+    for value in set(value for value in values if isinstance(value, str)):
+        result_by_value[value] = _is_date_fast(value, fuzzy, session_labels)
+    dates_mask = np.fromiter((result_by_value.get(value, False) if isinstance(value, str) else False for value in values),
+                             dtype=bool, count=len(values))
+
+    return dates_mask
+
+
 def keep_only_digits(input_string: str) -> str:
     """This function takes as input a string and returns the same string but only containing digits
     Args:
@@ -41,9 +114,8 @@ def load_txt_file_as_string(path_txt_file: str) -> str:
     Returns:
         content: content of txt file
     """
-    file = open(path_txt_file)
-    content = file.read()
-    file.close()
+    with open(path_txt_file) as file:  # the file is closed even if read() raises
+        content = file.read()
 
     return content
 
@@ -92,9 +164,9 @@ def str2bool(v: str) -> bool:
     """
     if isinstance(v, bool):
         return v
-    if v.lower() in ('yes', 'true', 't', 'y', '1'):
+    if v.lower() in _STR2BOOL_TRUE:
         return True
-    elif v.lower() in ('no', 'false', 'f', 'n', '0'):
+    elif v.lower() in _STR2BOOL_FALSE:
         return False
     else:
         raise ValueError('Boolean value expected.')
@@ -117,6 +189,8 @@ def load_json_file_as_dict(path_json_file: str) -> dict:
         path_json_file: path to json file
     Returns:
         content: content of json file as dict
+    Note:
+        to load many json files at once (e.g. BIDS sidecars), use load_json_files_concurrently in utils_io.py
     """
     with open(path_json_file, 'r') as json_file:
         content = json.load(json_file)
@@ -147,3 +221,121 @@ def get_filename_with_extensions(file_path: str) -> str:
     filename_with_ext = os.path.basename(file_path)  # get filename from path including extension(s)
 
     return filename_with_ext
+
+
+def _is_pandas_series(obj) -> bool:
+    return hasattr(obj, "str") and hasattr(obj, "factorize")  # duck typing, so that pandas does not need to be imported
+
+
+def _factorize(values) -> tuple:
+    """This function encodes the input values as integer codes into the list of their distinct values,
+    so that the batch kernels below only process each distinct value once (metadata columns are very repetitive)
+    Args:
+        values: list, numpy array or pandas Series
+    Returns:
+        codes: integer array such that values[i] == uniques[codes[i]]
+        uniques: list of distinct values
+    """
+    if _is_pandas_series(values):
+        codes, uniques = values.factorize()  # the default marks missing values with the code -1 in all pandas versions
+        uniques = list(uniques) + [None]  # missing values (code -1) are mapped to the trailing None
+        return codes, uniques
+    if isinstance(values, np.ndarray) and values.dtype.kind in "US":
+        uniques, codes = np.unique(values, return_inverse=True)
+        return codes.ravel(), uniques.tolist()
+    position_by_value = {}  # type: dict
+    codes = np.fromiter((position_by_value.setdefault(value, len(position_by_value)) for value in values), dtype=np.intp)
+    return codes, list(position_by_value)
+
+
+def _rebuild_like(input_strings,
+                  codes: np.ndarray,
+                  output_uniques: list):
+    """This function expands the per-distinct-value outputs back to the full length, with the same container type as the input"""
+    output_strings = np.array(output_uniques, dtype=object)[codes]
+    if _is_pandas_series(input_strings):
+        return type(input_strings)(output_strings, index=input_strings.index, name=input_strings.name)
+    if isinstance(input_strings, np.ndarray):
+        if input_strings.dtype.kind in "US":  # string arrays cannot hold missing values
+            return output_strings.astype(str)
+        return output_strings  # object arrays stay object arrays, so missing values (None, nan) stay missing
+
+    return output_strings.tolist()
+
+
+def keep_only_digits_batch(input_strings):
+    """This function is the batch version of keep_only_digits (e.g. for PatientAge values like "075Y" or subject ids).
+    Each distinct string is processed only once, with a precompiled regex.
+    Args:
+        input_strings: list, numpy string array or pandas Series
+    Returns:
+        output_strings: same type as input_strings, where each string only contains its digit characters
+    """
+    if isinstance(input_strings, np.ndarray) and input_strings.dtype.kind == "S":  # bytes: decode, process and encode back
+        return np.char.encode(keep_only_digits_batch(np.char.decode(input_strings, "latin-1")), "latin-1")
+    codes, uniques = _factorize(input_strings)
+    strip_non_digits = _NON_DIGITS_RE.sub
+    output_uniques = [strip_non_digits("", string) if isinstance(string, str) else string for string in uniques]
+
+    return _rebuild_like(input_strings, codes, output_uniques)
+
+
+def add_leading_zeros_batch(input_strings,
+                            out_len: int):
+    """This function is the batch version of add_leading_zeros
+    Args:
+        input_strings: list, numpy string array or pandas Series
+        out_len: length of output strings with leading zeros
+    Returns:
+        output_strings: same type as input_strings, with leading zeros up to out_len characters
+    """
+    if isinstance(input_strings, np.ndarray):
+        return np.char.zfill(input_strings, out_len)
+    if not _is_pandas_series(input_strings):  # zfill is cheap, so factorizing a list does not pay off
+        return [string.zfill(out_len) if isinstance(string, str) else string for string in input_strings]  # missing values are kept
+    codes, uniques = _factorize(input_strings)
+    output_uniques = [string.zfill(out_len) if isinstance(string, str) else string for string in uniques]
+
+    return _rebuild_like(input_strings, codes, output_uniques)
+
+
+def remove_leading_zeros_batch(input_strings):
+    """This function is the batch version of remove_leading_zeros
+    Args:
+        input_strings: list, numpy string array or pandas Series
+    Returns:
+        output_strings: same type as input_strings, without leading zeros
+    """
+    if isinstance(input_strings, np.ndarray):
+        return np.char.lstrip(input_strings, b'0' if input_strings.dtype.kind == "S" else '0')
+    if not _is_pandas_series(input_strings):  # lstrip is cheap, so factorizing a list does not pay off
+        return [string.lstrip('0') if isinstance(string, str) else string for string in input_strings]  # missing values are kept
+    codes, uniques = _factorize(input_strings)
+    output_uniques = [string.lstrip('0') if isinstance(string, str) else string for string in uniques]
+
+    return _rebuild_like(input_strings, codes, output_uniques)
+
+
+def str2bool_batch(values) -> tuple:
+    """This function is the batch version of str2bool. Instead of raising on the first invalid value,
+    it converts all the valid ones and reports the positions of the invalid ones.
+    Args:
+        values: list, numpy array or pandas Series of strings (or booleans)
+    Returns:
+        bools: boolean array with the same length as values (invalid values are set to False)
+        invalid_idxs: positional indexes of the values that cannot be interpreted as booleans
+    """
+    codes, uniques = _factorize(values)
+    is_true = np.zeros(len(uniques), dtype=bool)
+    is_valid = np.zeros(len(uniques), dtype=bool)
+    for idx, value in enumerate(uniques):
+        if isinstance(value, (bool, np.bool_)):
+            is_true[idx], is_valid[idx] = bool(value), True
+        elif isinstance(value, str):
+            lowered = value.lower()
+            is_true[idx] = lowered in _STR2BOOL_TRUE
+            is_valid[idx] = is_true[idx] or lowered in _STR2BOOL_FALSE
+    bools = is_true[codes]
+    invalid_idxs = np.flatnonzero(~is_valid[codes])
+
+    return bools, invalid_idxs